@@ -23,6 +23,7 @@ __license__     = 'MIT'
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.ticker
+from matplotlib.collections import LineCollection
 
 # credit string to include at top of plot, to ensure people know they can use the plot
 # (someone once told me, every plot appearing somewhere in the internet
@@ -31,15 +32,8 @@ import matplotlib.ticker
 # the license for the code is mentioned in the LICENSE file (and above)
 credit_str  = f'{__author__}, CC BY-SA 4.0'
 
-plt.rcParams.update({'font.size':12})
-# force ticks to point inwards
-plt.rcParams['xtick.direction'] = 'in'
-plt.rcParams['ytick.direction'] = 'in'
-plt.rcParams['xtick.top']       = True
-plt.rcParams['ytick.right']     = True
 
-
-def make_plot( fname_plot='' ):
+def make_plot( fname_plot='', dpi=150, tight=False ):
 #;{{{
     '''
     Output a plot, either to X-window (default) or into file. 
@@ -47,7 +41,12 @@ def make_plot( fname_plot='' ):
     Parameters
     ----------
     fname_plot: str
-        possible values are 'Bosch', 'my_dset', 'EUROfusion'
+        if empty, plot will be output into X-window
+    dpi: int
+        resolution of the plot written into file
+    tight: bool
+        if True, crop the plot to its tight bounding box (requires an 
+        additional draw of the figure)
 
     Returns
     -------
@@ -55,7 +54,10 @@ def make_plot( fname_plot='' ):
 
 
     if len(fname_plot) > 0:
-        plt.savefig( fname_plot, dpi=600, bbox_inches='tight' )
+        if tight:
+            plt.savefig( fname_plot, dpi=dpi, bbox_inches='tight', backend='Agg' )
+        else:
+            plt.savefig( fname_plot, dpi=dpi, backend='Agg' )
         print( 'written plot into file {0}'.format(fname_plot) )
     else:
         plt.show()
@@ -87,6 +89,9 @@ def oplot_Ocut( ax, y_range=[], linestyle='solid', linewidth=3, color='black' ):
 
     Returns
     -------
+    tuple
+        segments: list with one (N,2) numpy array with the vertices of the line,
+        style: dict with the line properties (linestyle, linewidth, color, label)
     """
     if len(y_range) == 0:
         y0, y1 = ax.get_ylim()
@@ -94,21 +99,21 @@ def oplot_Ocut( ax, y_range=[], linestyle='solid', linewidth=3, color='black' ):
         y0  = y_range[0]
         y1  = y_range[1]
 
-    # plot the cut-off position
-    ax.plot( [1,1], [y0,y1],
-             marker='None',
-             linestyle=linestyle, linewidth=linewidth, 
-             color=color, 
-           )
+    # vertices of the cut-off position
+    segments = [ np.array( [[1.,y0], [1.,y1]] ) ]
+    style    = { 'linestyle':linestyle, 'linewidth':linewidth, 'color':color, 'label':None }
+
     # write text to the cut-off (annotate it)
     txt_y   = y1 - .3*(y1-y0)   #1.4
     ax.annotate( 'O cut-off', xy=(1.,txt_y), xytext=(1.,txt_y), rotation=90,
                  horizontalalignment='right', verticalalignment='bottom',
                )
+
+    return segments, style
     #;}}}
 
 
-def oplot_XRcut( ax, linestyle='solid', linewidth=3, color='black' ):
+def oplot_XRcut( ax, x_range=[], xgrid=None, linestyle='solid', linewidth=3, color='black' ):
     #;{{{
     """
     Overplot the X-mode R cut-off in a CMA diagram.
@@ -135,33 +140,47 @@ def oplot_XRcut( ax, linestyle='solid', linewidth=3, color='black' ):
     Parameters
     ----------
     ax: Axes object
+    x_range: list or np.array
+        2-element list or array, where currently only the first element is used to 
+        specify the start point for the line indicating the X-mode R cut-off (which
+        ends at X=1). If not provided, the range of the y-axis is used.
+    xgrid: np.array
+        grid of X-values shared between the lines, only the part X <= 1 is used.
+        If not provided, a grid is created.
     linestyle: str
     linewidth: int
     color: str
 
     Returns
     ------
+    tuple
+        segments: list with one (N,2) numpy array with the vertices of the line,
+        style: dict with the line properties (linestyle, linewidth, color, label)
     """
 
-    x0, x1  = ax.get_ylim()
-    x_range = np.array( [x0, x1] )
-
-    arr_x   = np.linspace( np.min(x_range), np.max(x_range), 200 )
+    if xgrid is None:
+        if len(x_range) == 0:
+            x0, x1  = ax.get_ylim()
+            arr_x   = np.linspace( min(x0, x1), max(x0, x1), 200 )
+        else:
+            arr_x   = np.linspace( np.min(x_range), 1., 200 )
+    else:
+        arr_x   = xgrid[ xgrid <= 1. ]
 
     # calculate right-hand cut-off
     arr_y   = 1. - arr_x 
-    ax.plot( arr_x, arr_y, 
-             linestyle=linestyle, marker='None', linewidth=linewidth, 
-             color=color, 
-           )
+    segments = [ np.column_stack( (arr_x, arr_y) ) ]
+    style    = { 'linestyle':linestyle, 'linewidth':linewidth, 'color':color, 'label':None }
 
     ax.annotate( 'XR cut-off', xy=(.2,.2), xytext=(.2,.2), rotation=-47,
                   horizontalalignment='left', verticalalignment='bottom',
                )
+
+    return segments, style
     #;}}}
 
 
-def oplot_XLcut( ax, x_range=[], linestyle='solid', linewidth=3, color='black' ):
+def oplot_XLcut( ax, x_range=[], xgrid=None, linestyle='solid', linewidth=3, color='black' ):
     #;{{{
     """
     Overplot the X-mode L cut-off in a CMA diagram.
@@ -192,32 +211,73 @@ def oplot_XLcut( ax, x_range=[], linestyle='solid', linewidth=3, color='black' )
         2-element list or array specifying the start and end point for the line 
         indicating the X-mode L cut-off. If not provided, the range of the x-axis
         is used.
+    xgrid: np.array
+        grid of X-values shared between the lines, only the part X >= 1 is used.
+        If not provided, a grid is created.
     linestyle: str
     linewidth: int
     color: str
 
     Returns
     ------
+    tuple
+        segments: list with one (N,2) numpy array with the vertices of the line,
+        style: dict with the line properties (linestyle, linewidth, color, label)
     """
 
-    if len(x_range) == 0:
-        x0, x1  = ax.get_xlim()
-        x_range = np.array( [x0, x1] )
-
-    arr_x = np.linspace( 1., np.max(x_range), 200 )
+    if xgrid is None:
+        if len(x_range) == 0:
+            x0, x1  = ax.get_xlim()
+            x_range = np.array( [x0, x1] )
+        arr_x = np.linspace( 1., np.max(x_range), 200 )
+    else:
+        arr_x = xgrid[ xgrid >= 1. ]
     arr_y = -1. + arr_x
-    ax.plot( arr_x, arr_y,
-             marker='None',
-             linestyle=linestyle, linewidth=linewidth, 
-             color=color, 
-            )
+    segments = [ np.column_stack( (arr_x, arr_y) ) ]
+    style    = { 'linestyle':linestyle, 'linewidth':linewidth, 'color':color, 'label':None }
+
     ax.annotate( 'XL cut-off', xy=(1.2,.33), xytext=(1.2,.33), rotation=47,
                  horizontalalignment='left', verticalalignment='bottom',
                )
+
+    return segments, style
     #;}}}
 
 
-def oplot_Xres( ax, theta=np.array([90.]), annotation_x=np.array([.5]), 
+def calc_resonance( arr_x, theta ):
+    #;{{{
+    """
+    Calculate the resonance Y = sqrt( (1-X)/(1-X*cos(theta)) ) for all theta-values 
+    at once. The expression is evaluated in-place in a single output array.
+
+    Parameters
+    ----------
+    arr_x: np.array
+        X-values, 1D
+    theta: np.array
+        Angle of microwave propagation with respect to the background magnetic field B_0,
+        units are degrees.
+
+    Returns
+    -------
+    np.array
+        Y-values of shape (len(theta), len(arr_x)), NaN where no resonance exists
+    """
+
+    ct    = np.cos( np.deg2rad(theta) )[:,None]
+
+    arr_y = np.multiply( -ct, arr_x )
+    arr_y += 1.
+    np.divide( 1.-arr_x, arr_y, out=arr_y )
+    # negative values have no resonance, sqrt yields NaN
+    with np.errstate( invalid='ignore', divide='ignore' ):
+        np.sqrt( arr_y, out=arr_y )
+
+    return arr_y
+    #;}}}
+
+
+def oplot_Xres( ax, theta=np.array([90.]), annotation_x=np.array([.5]), xgrid=None,
                 linestyle='dashed', linewidth=3, color='black' 
               ):
     #;{{{
@@ -237,48 +297,52 @@ def oplot_Xres( ax, theta=np.array([90.]), annotation_x=np.array([.5]),
         units are degrees.
     annotation_x: np.array
         X-coordinates for the labels (which are the theta-values) to be written into the plot.
+    xgrid: np.array
+        grid of X-values shared between the lines, only the part X <= 1 is used.
+        If not provided, a grid is created.
     linestyle: str
     linewidth: int
     color: str
 
     Returns
     ------
+    tuple
+        segments: numpy array of shape (len(theta),N,2) with the vertices of
+                  one line per theta value (NaN-values result in gaps),
+        style: dict with the line properties (linestyle, linewidth, color, label)
     """
 
-    for ii in range( len(theta) ):
+    # string for legend (only one entry for all theta values)
+    style    = { 'linestyle':linestyle, 'linewidth':linewidth, 'color':color, 'label':'X-resonance' }
 
+    # evaluate resonance for all theta values at once, shape (len(theta), len(arr_x))
+    if xgrid is None:
         arr_x = np.linspace( 0., 1., 200 )
-        arr_y = +1.*np.sqrt( (1.-arr_x)/(1.-arr_x*np.cos(theta[ii]/180.*np.pi))  )
+    else:
+        arr_x = xgrid[ xgrid <= 1. ]
+    arr_y = calc_resonance( arr_x, theta )
 
-        # remove NaN-values in arr_y
-        arr_x = arr_x[ np.isfinite(arr_y) ]
-        arr_y = arr_y[ np.isfinite(arr_y) ]
+    # NaN-values (no resonance) result in gaps in the line
+    segments = np.stack( (np.broadcast_to(arr_x, arr_y.shape), arr_y), axis=-1 )
 
-        # string for legend (only for one theta value)
-        if theta[ii] == theta[0]:
-            label_str = 'X-resonance'
-        else:
-            label_str = None
-        ax.plot( arr_x, arr_y,
-                 marker='None',
-                 linestyle=linestyle, linewidth=linewidth,
-                 color=color, 
-                 label=label_str
-                )
-
-        # annotate with theta-value
-        annot_x_id = np.argmin( np.abs(arr_x-annotation_x[ii]) )
-        annot_x = arr_x[annot_x_id]
-        annot_y = arr_y[annot_x_id]
+    # annotate with theta-value (closest finite point to annotation_x)
+    finite      = np.isfinite( arr_y )
+    dist        = np.where( finite, np.abs(arr_x-annotation_x[:,None]), np.inf )
+    annot_x_ids = np.argmin( dist, axis=1 )
+    for ii in range( len(theta) ):
+        annot_x = arr_x[annot_x_ids[ii]]
+        annot_y = arr_y[ii,annot_x_ids[ii]]
         annot_txt = r'${0:2.0f}\degree$'.format( theta[ii] )
         ax.annotate( annot_txt, xy=(annot_x,annot_y), xytext=(annot_x,annot_y-.05), 
                       horizontalalignment='left', verticalalignment='top',
                     )
+
+    return segments, style
     #;}}}
 
 
 def oplot_Ores( ax, theta=np.array([30.]), annotation_x=np.array([1.5]),
-                x_range=[], 
+                x_range=[], xgrid=None,
                 linestyle='dotted', linewidth=3, color='black' 
               ):
     #;{{{
@@ -302,43 +366,49 @@ def oplot_Ores( ax, theta=np.array([30.]), annotation_x=np.array([1.5]),
         2-element list or array, where currently only the second element is used to specify 
         the end point for the line indicating the O-resonance. If not provided, the range of 
         the x-axis is used.
+    xgrid: np.array
+        grid of X-values shared between the lines, only the part X > 1 is used.
+        If not provided, a grid is created.
     linestyle: str
     linewidth: int
     color: str
 
     Returns
+    -------
+    tuple
+        segments: numpy array of shape (len(theta),N,2) with the vertices of
+                  one line per theta value (NaN-values result in gaps),
+        style: dict with the line properties (linestyle, linewidth, color, label)
     """
 
-    if len(x_range) == 0:
-        x0, x1  = ax.get_xlim()
-        x_range = np.array( [x0, x1] )
+    if xgrid is None:
+        if len(x_range) == 0:
+            x0, x1  = ax.get_xlim()
+            x_range = np.array( [x0, x1] )
+        arr_x = np.linspace( (1.+1e-6), np.max(x_range), 200)
+    else:
+        arr_x = xgrid[ xgrid > 1. ]
 
-    arr_x = np.linspace( (1.+1e-6), np.max(x_range), 200)
+    # string for legend (only one entry for all theta values)
+    style    = { 'linestyle':linestyle, 'linewidth':linewidth, 'color':color, 'label':'O-resonance' }
 
-    for ii in range( len(theta) ):
-        arr_y = +1.*np.sqrt( (1.-arr_x)/(1.-arr_x*np.cos(theta[ii]/180.*np.pi))  )
+    # evaluate resonance for all theta values at once, shape (len(theta), len(arr_x))
+    arr_y = calc_resonance( arr_x, theta )
 
-        # string for legend (only for one theta value)
-        if theta[ii] == theta[0]:
-            label_str = 'O-resonance'
-        else:
-            label_str = None
-        ax.plot( arr_x, arr_y,
-                 marker='None',
-                 linestyle=linestyle, linewidth=linewidth, 
-                 color=color, 
-                 label=label_str
-               )
+    # NaN-values (no resonance) result in gaps in the line
+    segments = np.stack( (np.broadcast_to(arr_x, arr_y.shape), arr_y), axis=-1 )
 
-        # annotate with theta-value
-        annot_x_id = np.argmin( np.abs(arr_x-annotation_x[ii]) )
-        annot_x = arr_x[annot_x_id]
-        annot_y = arr_y[annot_x_id]
+    # annotate with theta-value
+    annot_x_ids = np.argmin( np.abs(arr_x-annotation_x[:,None]), axis=1 )
+    for ii in range( len(theta) ):
+        annot_x = arr_x[annot_x_ids[ii]]
+        annot_y = arr_y[ii,annot_x_ids[ii]]
         annot_txt = r'${0:2.0f}\degree$'.format( theta[ii] )
         ax.annotate( annot_txt, xy=(annot_x,annot_y), xytext=(annot_x,annot_y+.01), 
                       horizontalalignment='left', verticalalignment='bottom',
                     )
 
+    return segments, style
     #;}}}
 
 
@@ -364,6 +434,9 @@ def oplot_ECR( ax, x_range=[], linestyle='solid', linewidth=3, color='black' ):
 
     Returns
     ------
+    tuple
+        segments: list with one (N,2) numpy array with the vertices of the line,
+        style: dict with the line properties (linestyle, linewidth, color, label)
     """
 
     if len(x_range) == 0:
@@ -372,23 +445,90 @@ def oplot_ECR( ax, x_range=[], linestyle='solid', linewidth=3, color='black' ):
 
     arr_x = x_range
     arr_y = np.array( [1.,1.] )
-    ax.plot( arr_x, arr_y,
-             marker='None', 
-             linestyle=linestyle, linewidth=linewidth,
-             color=color, 
-            )
+    segments = [ np.column_stack( (arr_x, arr_y) ) ]
+    style    = { 'linestyle':linestyle, 'linewidth':linewidth, 'color':color, 'label':None }
+
     label_str_Rres = 'ECR'
     ax.annotate( label_str_Rres, xy=(.1,1), xytext=(.1,1.02),
                  horizontalalignment='left', verticalalignment='bottom',     
                )
+
+    return segments, style
     #;}}}
                 
 
+def add_lines( ax, lines ):
+    #;{{{
+    """
+    Add the lines returned by the oplot_* functions to the plot.
+
+    All lines sharing the same style are collected into one LineCollection,
+    such that only one artist per style needs to be drawn (instead of one 
+    Line2D object per line).
+
+    Parameters
+    ----------
+    ax: Axes object
+    lines: list
+        list of tuples (segments, style) as returned by the oplot_* functions,
+        segments being a sequence of (N,2) numpy arrays (a list or a 3D array)
+
+    Returns
+    -------
+    list
+        LineCollection objects added to the plot
+    """
+
+    # group segments by (linestyle, linewidth, color)
+    groups = {}
+    for segments, style in lines:
+        key = ( style['linestyle'], style['linewidth'], style['color'] )
+        if key not in groups:
+            groups[key] = { 'segments':[], 'label':None }
+        groups[key]['segments'].extend( segments )
+        if style['label'] is not None:
+            groups[key]['label'] = style['label']
+
+    collections = []
+    for (linestyle, linewidth, color), group in groups.items():
+        lc = LineCollection( group['segments'],
+                             linestyles=linestyle, linewidths=linewidth,
+                             colors=color,
+                             label=group['label']
+                           )
+        ax.add_collection( lc )
+        collections.append( lc )
+
+    return collections
+    #;}}}
+
+
+def set_plot_style():
+    #;{{{
+    """
+    Change the default plot formatting (called from main, such that importing
+    this module does not change the global matplotlib settings).
+    """
+
+    plt.rcParams.update({'font.size':12})
+    # force ticks to point inwards
+    plt.rcParams['xtick.direction'] = 'in'
+    plt.rcParams['ytick.direction'] = 'in'
+    plt.rcParams['xtick.top']       = True
+    plt.rcParams['ytick.right']     = True
+    #;}}}
+
+
 def main():
     #;{{{
 
+    set_plot_style()
+
     # plot configuration
     fname_plot  = 'CMA_diagram.png'
+    # plot into file only: non-interactive backend, no GUI toolkit needs to be loaded
+    if len(fname_plot) > 0:
+        plt.switch_backend( 'Agg' )
     # linewidth for O- and X-mode
     lw_O        = 3
     lw_X        = 3
@@ -409,33 +549,45 @@ def main():
     x_range = np.array( [0,3] )
     y_range = np.array( [0,2] )
 
+    # grid of X-values shared by all lines, 1 is exactly a grid point
+    xgrid   = np.linspace( 0., x_range[1], 601 )
+
+    # lines are collected first and added to the plot at once
+    lines = []
+
     # oplot O cut-off
-    oplot_Ocut( ax1, y_range=y_range, linestyle=ls_Ocut, linewidth=lw_O, color=color_O )
+    lines.append( oplot_Ocut( ax1, y_range=y_range, linestyle=ls_Ocut, linewidth=lw_O, color=color_O ) )
 
     # oplot XR cut-off
-    oplot_XRcut( ax1, linestyle=ls_Xcut, linewidth=lw_X, color=color_X )
+    lines.append( oplot_XRcut( ax1, x_range=x_range, xgrid=xgrid, linestyle=ls_Xcut, linewidth=lw_X, color=color_X ) )
 
     # oplot XL cut-off
-    oplot_XLcut( ax1, x_range=x_range, linestyle=ls_Xcut, linewidth=lw_X, color=color_X )
+    lines.append( oplot_XLcut( ax1, x_range=x_range, xgrid=xgrid, linestyle=ls_Xcut, linewidth=lw_X, color=color_X ) )
 
     # oplot resonances for different thetas
     thetas          = np.array( [90., 30., 10.] )
     annotations_x   = np.array( [.5, .65, .8] )
     # X resonance
-    oplot_Xres( ax1, theta=thetas, annotation_x=annotations_x, 
-                linestyle=ls_Xres, linewidth=lw_X, color=color_X 
-              )
+    lines.append( oplot_Xres( ax1, theta=thetas, annotation_x=annotations_x, xgrid=xgrid,
+                              linestyle=ls_Xres, linewidth=lw_X, color=color_X 
+                            ) )
     # O resonance
     thetas          = np.array( [30., 10.] )
     annotations_x   = np.array( [1.5, 1.2] )
-    oplot_Ores( ax1, theta=thetas, annotation_x=annotations_x,
-                x_range=x_range,
-                linestyle=ls_Ores, linewidth=lw_O, color=color_O 
-              )
+    lines.append( oplot_Ores( ax1, theta=thetas, annotation_x=annotations_x,
+                              x_range=x_range, xgrid=xgrid,
+                              linestyle=ls_Ores, linewidth=lw_O, color=color_O 
+                            ) )
     # R-resonance (resonance for theta=0)
-    oplot_ECR( ax1, x_range=x_range, linestyle='solid', linewidth=lw_X, color=color_X )
+    lines.append( oplot_ECR( ax1, x_range=x_range, linestyle='solid', linewidth=lw_X, color=color_X ) )
+
+    # one LineCollection per line style
+    collections = add_lines( ax1, lines )
 
-    ax1.legend( loc='lower right' )
+    # only the resonances have a legend entry, pass them directly 
+    # (avoids searching through all artists of the axes)
+    handles = [ lc for lc in collections if not lc.get_label().startswith('_') ]
+    ax1.legend( handles=handles, labels=[ lc.get_label() for lc in handles ], loc='lower right' )
 
     # set axes labels
     ax1.set_xlabel( r'$X = (\omega_{pe}/\omega_0)^2 \propto n_e$' )
@@ -10,10 +10,12 @@ __copyright__   = 'Uni Stuttgart'
 __license__     = 'MIT'
 
 # import standard modules
+import gzip
+import hashlib
+import os
+import re
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.ticker import ScalarFormatter
-from urllib.request import urlopen
+from urllib.request import urlopen, Request
 
 # credit string to include at top of plot, to ensure people know they can use the plot
 # (someone once told me, every plot appearing somewhere in the internet
@@ -22,32 +24,32 @@ from urllib.request import urlopen
 # the license for the code is mentioned in the LICENSE file (and above)
 credit_str  = f'{__author__}, CC BY-SA 4.0'
 
-# change default plot formatting
-plt.rcParams.update({'font.size': 18})
-# force ticks to point inwards
-plt.rcParams['xtick.direction'] = 'in'
-plt.rcParams['ytick.direction'] = 'in'
-plt.rcParams['xtick.top']       = True
-plt.rcParams['ytick.right']     = True
+# regular expression extracting the (tag, value) pairs from the NIST dataset
+NIST_pattern = re.compile( r'^(Atomic Number|Atomic Symbol|Mass Number|Relative Atomic Mass)'
+                           r'[ \t]*=[ \t]*([^\s(]+)', re.M )
 
+# atomic mass unit in units of MeV/c^2
+AMU         = 931.494095
+# masses of particle in units of u
+NEUTRON_U   = 1.00866491588
+PROTON_U    = 1.00727646688
+ELECTRON_U  = 0.00054858
 
-def read_NIST_data( url='', fname='' ):
+
+def parse_NIST_data( text ):
 #{{{
     """
-    Read the atomic weight dataset from NIST from web or file.
+    Extract the atomic weight dataset from the NIST ascii format.
 
     Parameters
     ----------
-    url: string
-        datasets from NIST can be obtained via queries, here we need the following
-        http://physics.nist.gov/cgi-bin/Compositions/stand_alone.pl?ele=&ascii=ascii2&isotype=some
-    fname: string
-        alternatively to directly reading the data from NIST, NIST also offers to 
-        download an ascii file (which you need to do before running this script)
+    text: string
+        complete NIST dataset, as obtained from web or file
         
     Returns
     -------
     NIST_dataset: dict
+        numerical values as float64 numpy arrays, atomic symbols as list
     """
 
     # dictionary into which the data will be saved
@@ -60,63 +62,102 @@ def read_NIST_data( url='', fname='' ):
                      'Relative Atomic Mass':[]
                    }
 
+    # extract all (tag, value) pairs in one sweep over the text, 
+    # error-margins given within brackets () are not part of the match
+    for tag, value in NIST_pattern.findall( text ):
+        NIST_dataset[ tag ].append( value )
+
+    # check if list lengths is the same for each key
+    lengths = [ len( NIST_dataset[key] ) for key in NIST_dataset ]
+    if not all( elem == lengths[0] for elem in lengths ):
+        print( 'WARNING: there is an error in extracting the data for the file' )
+        print( '         and sorting it into a dictionary' )
+
+    # convert numerical values into numpy arrays (once, here, such that
+    # the functions using the dataset do not need to convert them again)
+    for tag in NIST_dataset:
+        if tag != 'Atomic Symbol':
+            NIST_dataset[ tag ] = np.fromiter( map(float, NIST_dataset[ tag ]), 
+                                               dtype=np.float64, count=len(NIST_dataset[ tag ]) )
+
+    return NIST_dataset
+#}}}
+
+
+def read_NIST_data( url='', fname='', refresh=False ):
+#{{{
+    """
+    Read the atomic weight dataset from NIST from web or file.
+
+    Parameters
+    ----------
+    url: string
+        datasets from NIST can be obtained via queries, here we need the following
+        http://physics.nist.gov/cgi-bin/Compositions/stand_alone.pl?ele=&ascii=ascii2&isotype=some
+        the parsed dataset is cached in the user's cache directory 
+        (~/.cache/fusion_plots/, or $XDG_CACHE_HOME/fusion_plots/), one file 
+        per url, and re-used in subsequent calls with the same url
+    fname: string
+        alternatively to directly reading the data from NIST, NIST also offers to 
+        download an ascii file (which you need to do before running this script);
+        the parsed file is cached next to it as .npz-file, which is used as long 
+        as it is newer than the ascii file
+    refresh: boolean
+        if True, ignore the cached dataset and read it again
+        
+    Returns
+    -------
+    NIST_dataset: dict
+    """
+
+    # if available, use the cached version of the already parsed dataset
+    fname_cache = ''
+    if len(url) > 0 and len(fname) == 0:
+        # one cache file per url
+        key = hashlib.blake2b( url.encode(), digest_size=8 ).hexdigest()
+        fname_cache = os.path.join( os.environ.get( 'XDG_CACHE_HOME', 
+                                                    os.path.join( os.path.expanduser('~'), '.cache' ) ),
+                                    'fusion_plots', 'nist_atomic_weights_{0}.npz'.format(key) )
+        use_cache   = os.path.isfile( fname_cache )
+    elif len(url) == 0 and len(fname) > 0:
+        fname_cache = os.path.splitext( fname )[0] + '.npz'
+        use_cache   = ( os.path.isfile( fname_cache ) 
+                        and os.path.getmtime( fname_cache ) >= os.path.getmtime( fname ) )
+    if len(fname_cache) > 0 and use_cache and not refresh:
+        # atomic symbols are stored as numpy array, convert them back into a
+        # list to return the same types as when parsing the dataset
+        with np.load( fname_cache ) as cache:
+            return { key: (cache[key].tolist() if key == 'Atomic Symbol' else cache[key])
+                     for key in cache.files }
+
+    # read the complete NIST dataset as one string, from webpage or from file
+    text = ''
     # if url is provided, read NIST dataset from webpage
     if len(url) > 0:
         # open connection to URL and check if everything is fine
-        web_NIST = urlopen(url)
-        if (web_NIST.getcode() != 200):
-            print( 'ERROR: http-code while trying to read NIST data from web: {0}'.format(web_NIST.getcode()) )
-            return -1
-        # read website line by line
-        for line in web_NIST:
-            # decode line into readable string
-            decoded_line = line.decode( "utf-8" )
-
-            for label in NIST_dataset:
-                if decoded_line.startswith( label ):
-
-                    # get index of "=", starting to look after identifier text at beginning
-                    # note: python gets the correct position (text at beginning is just ignored)
-                    id_0 = decoded_line.index( "=", len(label) ) + 1
-
-                    # extract value and if present, remove error-margin, given within brackets ()
-                    if '(' in decoded_line[ id_0: ]:
-                        id_1    = decoded_line.index( "(", len(label) )
-                    else:
-                        id_1    = len(decoded_line)
-                    if label == 'Atomic Symbol':
-                        val = decoded_line[id_0:id_1]
-                    else:
-                        val = float(decoded_line[id_0:id_1])
-
-                    # add value to dictionary
-                    NIST_dataset[ label ].append(val)
-         
-
+        # (request compressed transfer, the dataset is plain text)
+        with urlopen( Request( url, headers={'Accept-Encoding':'gzip'} ) ) as web_NIST:
+            if (web_NIST.getcode() != 200):
+                print( 'ERROR: http-code while trying to read NIST data from web: {0}'.format(web_NIST.getcode()) )
+                return -1
+            data = web_NIST.read()
+            if web_NIST.headers.get( 'Content-Encoding' ) == 'gzip':
+                data = gzip.decompress( data )
+        text += data.decode( "utf-8" )
     # if filename is provided during function call, read NIST dataset from file
     if len(fname) > 0:
-        # loop through file line by line
-        for line in open( fname ):
-            if "=" in line:
-                tag, value = line.split( '=' )
-                tag   = tag.strip()
-                value = value.strip()
-                # remove parantheses in values which indicate error
-                if '(' in value:
-                    value = value.split( '(' )[0]
-                if tag in NIST_dataset.keys():
-                    NIST_dataset[ tag ].append( value )
-
-            # check if list lengths is the same for each key
-            if line == '\n':
-                lengths = []
-                # get the lengths of the arrays for each key
-                for key in NIST_dataset:
-                    lengths.append( len( NIST_dataset[key] ) )
-                # check if all the lengths are equal
-                if not all( elem == lengths[0] for elem in lengths ):
-                    print( 'WARNING: there is an error in extracting the data for the file' )
-                    print( '         and sorting it into a dictionary' )
+        with open( fname ) as f:
+            text += f.read()
+
+    NIST_dataset = parse_NIST_data( text )
+
+    # cache the parsed dataset, such that it does not need to be read again
+    if len(fname_cache) > 0:
+        try:
+            os.makedirs( os.path.dirname( os.path.abspath(fname_cache) ), exist_ok=True )
+            np.savez( fname_cache, **{ key: np.asarray( NIST_dataset[key] ) for key in NIST_dataset } )
+        except OSError:
+            print( 'WARNING: could not write cache file {0}'.format(fname_cache) )
 
     return NIST_dataset
 #}}}
@@ -133,66 +174,131 @@ def get_mass_number( NIST_dataset ):
 
     Returns
     -------
-    mass_number: numpy array
+    mass_number: numpy array of type int32
     """
 
-    atomic_mass = np.asarray( NIST_dataset['Relative Atomic Mass'], dtype=np.float32 )
-    mass_number = np.around( atomic_mass )
+    mass_number = np.rint( NIST_dataset['Relative Atomic Mass'] ).astype( np.int32 )
 
     return mass_number
 #}}}
 
 
-def get_binding_energy( NIST_dataset, norm=True):
+def calc_binding_energy( atomic_mass, atomic_number, mass_number, norm=True ):
 #{{{
     """
+    Calculates the binding energy from the mass defect,
+        ( (A-Z)*m_n + Z*(m_p+m_e) - m ) * amu
+    evaluated in-place in a single buffer to avoid temporary arrays.
 
     Parameters
     ----------
-    NIST_dataset: dict
+    atomic_mass: numpy array
+        relative atomic mass m in units of u
+    atomic_number: numpy array
+        atomic number Z
+    mass_number: numpy array
+        mass number A
     norm: boolean
+        if True, binding energy per nucleon is returned
 
     Returns
     -------
     binding_energy: numpy array
+        in units of MeV
     """
 
-    # atomic mass unit in units of MeV/c^2
-    amu         = 931.494095
-    # masses of particle in units of u
-    neutron_u   = 1.00866491588
-    proton_u    = 1.00727646688
-    electron_u  = 0.00054858
-
-    atomic_mass     = np.asarray( NIST_dataset['Relative Atomic Mass'], dtype=np.float32 )
-    atomic_number   = np.asarray( NIST_dataset['Atomic Number'], dtype=np.float32 )
-    mass_number     = get_mass_number( NIST_dataset )
-    n_neutrons      = mass_number - atomic_number
-    mass_defect     = ( ( n_neutrons*neutron_u + atomic_number*proton_u + atomic_number*electron_u ) - atomic_mass ) * amu
+    bind_energy     = np.subtract( mass_number, atomic_number, dtype=np.float64 )
+    bind_energy    *= NEUTRON_U
+    bind_energy    += (PROTON_U + ELECTRON_U) * atomic_number
+    bind_energy    -= atomic_mass
+    bind_energy    *= AMU
 
     if norm:
-        bind_energy = mass_defect/mass_number
-    else:
-        bind_energy = mass_defect
+        bind_energy /= mass_number
 
     return bind_energy
 #}}}
 
 
+def get_binding_energy( NIST_dataset, norm=True, mass_number=None ):
+#{{{
+    """
+
+    Parameters
+    ----------
+    NIST_dataset: dict
+    norm: boolean
+    mass_number: numpy array
+        mass numbers as returned by get_mass_number, if not provided
+        they are extracted from NIST_dataset
+
+    Returns
+    -------
+    binding_energy: numpy array
+    """
+
+    if mass_number is None:
+        mass_number = get_mass_number( NIST_dataset )
+
+    return calc_binding_energy( NIST_dataset['Relative Atomic Mass'], 
+                                NIST_dataset['Atomic Number'],
+                                mass_number,
+                                norm=norm )
+#}}}
+
+
+def set_plot_style():
+#{{{
+    """
+    Change the default plot formatting (called from main, such that importing
+    this module does not change the global matplotlib settings).
+    """
+
+    import matplotlib.pyplot as plt
+
+    plt.rcParams.update({'font.size': 18})
+    # force ticks to point inwards
+    plt.rcParams['xtick.direction'] = 'in'
+    plt.rcParams['ytick.direction'] = 'in'
+    plt.rcParams['xtick.top']       = True
+    plt.rcParams['ytick.right']     = True
+#}}}
+
+
 def main():
 #{{{
 
     # empty string results in plot into window, otherwise into file
     fname_plot  = 'binding_energy_per_nucleon.png'
 
+    # matplotlib is only imported here, such that the data functions of this
+    # module can be imported without initializing matplotlib;
+    # plot into file only: non-interactive backend, no GUI toolkit needs to be loaded
+    import matplotlib
+    if len(fname_plot) > 0:
+        matplotlib.use( 'Agg' )
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import ScalarFormatter
+    from matplotlib.collections import LineCollection
+
+    set_plot_style()
+
     # webpage with NIST data
     url = "http://physics.nist.gov/cgi-bin/Compositions/stand_alone.pl?ele=&ascii=ascii2&isotype=some"
     #fname = 'atomic_weights.dat'
 
     # load atomic weights dataset from NIST and process data 
     NIST_dataset        = read_NIST_data( url=url )#, #fname=fname )
+    atomic_mass         = NIST_dataset['Relative Atomic Mass']
+    atomic_number       = NIST_dataset['Atomic Number']
     mass_number         = get_mass_number( NIST_dataset )
-    bind_energy_norm    = get_binding_energy( NIST_dataset, norm=True)
+    bind_energy_norm    = calc_binding_energy( atomic_mass, atomic_number, mass_number, norm=True )
+
+    # NIST dataset is ordered by atomic number, sort by mass number 
+    # (otherwise the line connecting the data points zigzags)
+    order               = np.argsort( mass_number, kind='stable' )
+    mass_number         = mass_number[order]
+    bind_energy_norm    = bind_energy_norm[order]
 
     # start plot
     german_labels = False
@@ -206,11 +312,15 @@ def main():
     ax.axvline( x=62, color='lightgrey', linewidth=5 )
 
     # plot the binding energy per nucleon as function of mass number
-    ax.plot( mass_number, bind_energy_norm, 'o--', markersize=10 )
+    # (dashed line as LineCollection, markers as scatter, drawn on top of the line)
+    ax.add_collection( LineCollection( [ np.column_stack( (mass_number, bind_energy_norm) ) ],
+                                       linestyles='dashed', colors='C0', linewidths=1.5 ) )
+    ax.scatter( mass_number, bind_energy_norm, s=10**2, color='C0', zorder=2 )
 
     # format the x-axis
     ax.set_xscale( 'log' )
-    ax.set_xlim( min(mass_number), max(mass_number) )
+    # mass numbers are sorted
+    ax.set_xlim( mass_number[0], mass_number[-1] )
     ax.xaxis.set_major_formatter( ScalarFormatter() )
     if german_labels:
         ax.set_xlabel( r'Massenzahl $A$' )
@@ -224,40 +334,27 @@ def main():
         ax.set_ylabel( 'binding energy per nucleon in MeV' )
 
     # annotate a few important elements
-    plt.annotate( '$\mathregular{^1H}$',  
-                  xy=(1,0),   xytext=(2.3,.23), size='large',
-                  arrowprops=dict(arrowstyle="->" ) )
-    plt.annotate( '$\mathregular{^2H}$',  
-                  xy=(2,1),    xytext=(1.3,1.3) ,
-                  size='large' )
-    plt.annotate( '$\mathregular{^3H}$',  
-                  xy=(3,2.83), xytext=(2.1,3),
-                  size='large' )
-    plt.annotate( '$\mathregular{^3He}$',  
-                  xy=(3,2.57), xytext=(2.7,1.7) ,
-                  size='large' )
-    plt.annotate( '$\mathregular{^4He}$', 
-            xy=(4,7),   xytext=(3.1,7.3), size='large' )
-    plt.annotate( '$\mathregular{^6Li}$', 
-            xy=(6,5.3), xytext=(4.5,4.7), size='large' )
-    plt.annotate( '$\mathregular{^{9}Be}$', 
-            xy=(9,6.5), xytext=(20.,4.), size='large',  
-            arrowprops=dict(arrowstyle="->" ) )
-    plt.annotate( '$\mathregular{^{11}B}$', 
-            xy=(11,6.9), xytext=(30.,6.), size='large',  
-            arrowprops=dict(arrowstyle="->" ) )
-    plt.annotate( '$\mathregular{^{12}C}$', 
-            xy=(12,7.67), xytext=(5.,7.9), size='large',
-            arrowprops=dict(arrowstyle="->" ) )
-    plt.annotate( '$\mathregular{^{16}O}$', 
-            xy=(16,8), xytext=(7.,8.2), size='large',
-            arrowprops=dict(arrowstyle="->" ) )
-    plt.annotate( '$\mathregular{^{62}Ni}$', 
-            xy=(62,8.8), xytext=(35.,7.), size='large',
-            arrowprops=dict(arrowstyle="->" ) )
-    plt.annotate( '$\mathregular{^{235}U}$', 
-                  xy=(235,7.6), xytext=(100.,6.), size='large',
-                  arrowprops=dict(arrowstyle="->" ) )
+    # (label, xy of element, xy of text, draw arrow)
+    element_labels = [ ( '$\mathregular{^1H}$',      (1,0),      (2.3,.23),  True  ),
+                       ( '$\mathregular{^2H}$',      (2,1),      (1.3,1.3),  False ),
+                       ( '$\mathregular{^3H}$',      (3,2.83),   (2.1,3),    False ),
+                       ( '$\mathregular{^3He}$',     (3,2.57),   (2.7,1.7),  False ),
+                       ( '$\mathregular{^4He}$',     (4,7),      (3.1,7.3),  False ),
+                       ( '$\mathregular{^6Li}$',     (6,5.3),    (4.5,4.7),  False ),
+                       ( '$\mathregular{^{9}Be}$',   (9,6.5),    (20.,4.),   True  ),
+                       ( '$\mathregular{^{11}B}$',   (11,6.9),   (30.,6.),   True  ),
+                       ( '$\mathregular{^{12}C}$',   (12,7.67),  (5.,7.9),   True  ),
+                       ( '$\mathregular{^{16}O}$',   (16,8),     (7.,8.2),   True  ),
+                       ( '$\mathregular{^{62}Ni}$',  (62,8.8),   (35.,7.),   True  ),
+                       ( '$\mathregular{^{235}U}$',  (235,7.6),  (100.,6.),  True  ),
+                     ]
+    for label, xy, xytext, arrow in element_labels:
+        if arrow:
+            ax.annotate( label, xy=xy, xytext=xytext, size='large',
+                         arrowprops=dict(arrowstyle="->") )
+        else:
+            # labels without arrow: plain text is cheaper than an annotation
+            ax.text( xytext[0], xytext[1], label, size='large' )
 
     # indicate area useful for fusion and for fission by arrows
     if german_labels:
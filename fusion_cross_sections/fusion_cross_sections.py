@@ -18,12 +18,25 @@ __license__     = 'MIT'
 credit_str = f'{__author__}, CC BY-SA 4.0'
 
 # import standard modules
+import functools
+import hashlib
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.ticker
 import scipy.constants as consts
 
 #%%
+# coefficients for the NRL formula of the cross sections, one row per reaction
+NRL_reactions = { 'DD_a':0, 'DD_b':1, 'DT':2, 'DHe3':3, 'TT':4, 'THe3':5 }
+NRL_coefficients = np.array( [
+        [46.097, 372, 4.36e-4, 1.220, 0],       # DD_a
+        [47.88, 482, 3.08e-4, 1.177, 0],        # DD_b
+        [45.95, 50200, 1.368e-2, 1.076, 409],   # DT
+        [89.27, 25900, 3.98e-3, 1.297, 647],    # DHe3
+        [38.39, 448, 1.02e-3, 2.09, 0],         # TT
+        [123.1, 11250, 0, 0, 0],                # THe3
+        ], dtype=np.float64 )
+
+
 def cross_section_NRL(E, reaction='DT'):
     """
     The total cross section in barns (1 barns=1e-24 cm^2) as a function of E, 
@@ -40,7 +53,7 @@ def cross_section_NRL(E, reaction='DT'):
     E : array
         energy (in keV) of the incident particle towards a target ion at rest 
     reaction : str
-        Reaction: 'DT', 'DD_a', 'DD_b', 'DHe3', 'TT', 'THe3'. Default is 'DT'.
+        Reaction: 'DD_a', 'DD_b', 'DT', 'DHe3', 'TT', 'THe3'. Default is 'DT'.
 
     Returns
     -------
@@ -48,26 +61,84 @@ def cross_section_NRL(E, reaction='DT'):
         Total cross section in barns    
 
     """
-    cross_section_coefficients = {
-        'DD_a': [46.097, 372, 4.36e-4, 1.220, 0],
-        'DD_b': [47.88, 482, 3.08e-4, 1.177, 0], 
-        'DT':   [45.95, 50200, 1.368e-2, 1.076, 409],
-        'DHe3': [89.27, 25900, 3.98e-3, 1.297, 647],
-        'TT':   [38.39, 448, 1.02e-3, 2.09, 0],
-        'THe3': [123.1, 11250, 0, 0, 0],
-        }
-    A = cross_section_coefficients[reaction]
-    sigma_T = (A[4]+((A[3]-A[2]*E)**2+1)**(-1) * A[1])/(E*(np.exp(A[0]/np.sqrt(E))-1))
-    return(sigma_T)
-
-
-def cross_section_Miley( T_ion, reaction='DT') :
-#;{{{
+    if reaction not in NRL_reactions:
+        return cross_section_NRL_batch( E, [reaction] )[0]
+
+    # re-use the result of previous calls with the same energies
+    # (returned as copy, such that the cached values can not be modified)
+    E = np.asarray( E )
+    return cross_section_NRL_cached( reaction, E.tobytes(), E.shape, E.dtype.str ).copy()
+
+
+@functools.lru_cache( maxsize=32 )
+def cross_section_NRL_cached( reaction, E_bytes, E_shape, E_dtype ):
     """
+    Cached version of cross_section_NRL, with the energy E passed as bytes 
+    (together with its shape and dtype), such that it can be used as key.
     """
+    E = np.frombuffer( E_bytes, dtype=E_dtype ).reshape( E_shape )
+    return cross_section_NRL_batch( E, [reaction] )[0]
 
-    sigma_T = (T*(np.exp(A[0]/np.sqrt(T)) - 1.))**(-1) * ((A[1]/(1.+(A[2]*T-A[3])**2)) + A[4] )
-#;}}}
+
+def cross_section_NRL_batch(E, reactions):
+    """
+    Same as cross_section_NRL, but for several reactions at once, which are
+    evaluated in one broadcasted expression.
+
+    Parameters
+    ----------
+    E : array
+        energy (in keV) of the incident particle towards a target ion at rest 
+    reactions : list of str
+        Reactions: 'DD_a', 'DD_b', 'DT', 'DHe3', 'TT', 'THe3'
+
+    Returns
+    -------
+    sigma_v: array
+        Total cross section in barns, shape (len(reactions),) + E.shape
+
+    """
+    for reaction in reactions:
+        if reaction not in NRL_reactions:
+            print( 'ERROR: reaction {0} not available for the NRL formula'.format(reaction) )
+            return np.full( (len(reactions),) + np.shape(E), np.nan )
+
+    # coefficients as columns, shape (len(reactions), 1) each
+    A     = NRL_coefficients[ [NRL_reactions[reaction] for reaction in reactions] ].T[:,:,None]
+    shape = (len(reactions),) + np.shape(E)
+    E     = np.ravel( E )
+
+    # sigma_T = (A4 + A1/((A3-A2*E)**2+1)) / (E*(exp(A0/sqrt(E))-1)),
+    # evaluated in-place in two buffers to avoid temporary arrays
+    # (exp(x)-1 in one step with expm1, which is also accurate for small x)
+    denom   = np.divide( A[0], np.sqrt( E ) )
+    np.expm1( denom, out=denom )
+    denom  *= E
+    sigma_T = np.multiply( A[2], E )
+    np.subtract( A[3], sigma_T, out=sigma_T )
+    np.square( sigma_T, out=sigma_T )
+    sigma_T += 1.
+    np.divide( A[1], sigma_T, out=sigma_T )
+    sigma_T += A[4]
+    sigma_T /= denom
+    return(sigma_T.reshape(shape))
+
+
+# parameters for the cross sections from Bosch & Hale, per reaction:
+#   valid energy range in keV, B_G in sqrt(keV), A (Padé numerator), B (Padé denominator)
+Bosch_coefficients = {
+    'DT':   ( [.5, 550],   34.3827, [ 6.927e4, 7.454e8, 2.050e6, 5.2002e4, .0 ],
+                                    [ 6.38e1, -9.95e-1, 6.981e-5, 1.728e-4 ] ),
+    'DHe3': ( [.3, 900],   68.7508, [ 5.7501e6, 2.5226e3, 4.5566e1, .0, .0 ],
+                                    [ -3.1995e-3, -8.5530e-6, 5.9014e-8, .0 ] ),
+    'DD_a': ( [.5, 5000],  31.3970, [ 5.5576e4, 2.1054e2, -3.2638e-2, 1.4987e-6, 1.8181e-10 ],
+                                    [ .0, .0, .0, .0 ] ),
+    'DD_b': ( [.5, 4900],  31.3970, [ 5.3701e4, 3.3027e2, -1.2706e-1, 2.9327e-5, -2.5151e-9 ],
+                                    [ .0, .0, .0, .0 ] ),
+    }
+# reactions which are the sum of several parametrizations, or alternative names
+Bosch_reactions = { 'DT':['DT'], 'TD':['DT'], 'DHe3':['DHe3'], 'He3D':['DHe3'],
+                    'DD':['DD_a', 'DD_b'], 'DD_a':['DD_a'], 'DD_b':['DD_b'] }
 
 
 def cross_section_Bosch( T_ion, reaction='DT' ):
@@ -79,64 +150,176 @@ def cross_section_Bosch( T_ion, reaction='DT' ):
     Energy refers to the energy available in the center-of-mass
     frame (CM). For particle A with mass m_A striking a stationary
     particle B, following holds: E_A = E*(m_A+m_B)/m_B
+
+    For 'DD', both branches are evaluated together (one row each)
+    and summed up.
+    """
+
+    return cross_section_Bosch_batch( T_ion, [reaction] )[0]
+
+#;}}}
+
+
+def cross_section_Bosch_batch( T_ion, reactions ):
+#;{{{
+    """
+    Same as cross_section_Bosch, but for several reactions at once: the 
+    parametrizations of all reactions are evaluated in one pass over T_ion.
+
+    Parameters
+    ----------
+    T_ion : array
+        centre-of-mass energy in keV
+    reactions : list of str
+        Reactions: 'DT', 'DHe3', 'DD', 'DD_a', 'DD_b' (and 'TD', 'He3D')
+
+    Returns
+    -------
+    sigma_T: array
+        Total cross section in barns, shape (len(reactions),) + T_ion.shape
     """
 
     # T_ion: keV
     # cross-section in mb (millibarn, corresponding to 1e-31 m^2)
     # reactions as a function of the energy in the centre-of-mass (CM) frame
 
-    T = T_ion
-
-    if reaction == 'DT' or reaction == 'TD':
-        # valid energy range in keV
-        energy_range = np.array( [.5, 550] )
-        B_G = 34.3827   # sqrt(keV)
-        A   = [ 6.927e4, 7.454e8, 2.050e6, 5.2002e4, .0 ]
-        B   = [ 6.38e1, -9.95e-1, 6.981e-5, 1.728e-4 ]
-    elif reaction == 'He3D' or reaction == 'DHe3' :
-        energy_range = np.array( [.3, 900] )
-        B_G = 68.7508   # sqrt(keV)
-        A   = [ 5.7501e6, 2.5226e3, 4.5566e1, .0, .0 ]
-        B   = [ -3.1995e-3, -8.5530e-6, 5.9014e-8, .0 ] 
-    elif reaction == 'DD':
-        sigma_T_a = cross_section_Bosch( T_ion, reaction='DD_a' )
-        sigma_T_b = cross_section_Bosch( T_ion, reaction='DD_b' )
-        return sigma_T_a + sigma_T_b
-    elif reaction == 'DD_a':
-        energy_range = np.array( [ .5, 5000] )
-        B_G = 31.3970   # sqrt(keV)
-        A   = [ 5.5576e4, 2.1054e2, -3.2638e-2, 1.4987e-6, 1.8181e-10 ]
-        B   = [ .0, .0, .0, .0 ]
-    elif reaction == 'DD_b':
-        energy_range = np.array( [ .5, 4900] )
-        B_G = 31.3970   # sqrt(keV)
-        A   = [ 5.3701e4, 3.3027e2, -1.2706e-1, 2.9327e-5, -2.5151e-9 ]
-        B   = [ .0, .0, .0, .0 ]
-
-    # Padé polynomial
-    S_func = lambda T: ( 
-            A[0] + T*(A[1] + T*(A[2] + T*(A[3] + T*A[4]))) / 
-            (1.  + T*(B[0] + T*(B[1] + T*(B[2] + T*B[3]))))
-            )
-
-    # cross section in mbarn
-    sigma_T = S_func(T) / (T*np.exp(B_G/np.sqrt(T)))
+    for reaction in reactions:
+        if reaction not in Bosch_reactions:
+            print( 'ERROR: reaction {0} not available for Bosch cross sections'.format(reaction) )
+            return np.full( (len(reactions),) + np.shape(T_ion), np.nan )
+
+    # coefficients of all parametrizations needed, one row each, 
+    # and index of the first row of each reaction
+    keys         = [ key for reaction in reactions for key in Bosch_reactions[reaction] ]
+    first_row    = np.cumsum( [0] + [ len(Bosch_reactions[reaction]) for reaction in reactions[:-1] ] )
+    params       = [ Bosch_coefficients[key] for key in keys ]
+    energy_range = np.array( [ p[0] for p in params ] )
+    B_G          = np.array( [ p[1] for p in params ] )
+    A            = np.array( [ p[2] for p in params ] ).T[:,:,None]
+    B            = np.array( [ p[3] for p in params ] ).T[:,:,None]
+
+    # (at least 1D, such that the in-place operations also work for scalars)
+    T = np.atleast_1d( np.asarray( T_ion, dtype=np.float64 ) ).ravel()
+
+    # Padé polynomial, numerator and denominator evaluated (Horner scheme) 
+    # in-place in one buffer each to avoid temporary arrays
+    #   S = A0 + T*(A1 + T*(A2 + T*(A3 + T*A4))) / (1 + T*(B0 + T*(B1 + T*(B2 + T*B3))))
+    S_num   = A[4] * T
+    for a in A[3:0:-1]:
+        S_num += a
+        S_num *= T
+    S_den   = B[3] * T
+    for b in B[2::-1]:
+        S_den += b
+        S_den *= T
+    S_den  += 1.
+    S_num  /= S_den
+    S_num  += A[0]
+
+    # cross section in mbarn, S / (T*exp(B_G/sqrt(T))), where the Gamow factor 
+    # exp(B_G/sqrt(T)) is evaluated only once per different B_G (e.g. once for 'DD')
+    sqrtT       = np.sqrt( T )
+    B_G, ids    = np.unique( B_G, return_inverse=True )
+    gamow       = np.divide( B_G[:,None], sqrtT )
+    np.exp( gamow, out=gamow )
+    sigma_T     = gamow[ ids ]
+    sigma_T    *= T
+    np.divide( S_num, sigma_T, out=sigma_T )
 
     # set values outside of valid energy range to NaN
-    sigma_T[ T < energy_range[0] ] = np.nan
-    sigma_T[ T > energy_range[1] ] = np.nan
+    sigma_T = np.where( (T >= energy_range[:,0,None]) & (T <= energy_range[:,1,None]), sigma_T, np.nan )
+
+    # sum up the parametrizations of each reaction and return cross-section in barn 
+    # (with the shape of the input)
+    sigma_T = np.add.reduceat( sigma_T, first_row, axis=0 )
+    sigma_T *= 1e-3
+    return sigma_T.reshape( (len(reactions),) + np.shape(T_ion) )
+
+#;}}}
+
+def get_cross_sections( T_ion, dataset='Bosch', refresh=False ):
+#;{{{
+    """
+    Total cross sections in barns of the reactions D+D, D+T, D+3He.
+
+    The result is cached in the user's cache directory (~/.cache/fusion_plots/,
+    or $XDG_CACHE_HOME/fusion_plots/), identified by a hash of the source code
+    of this module, the numpy version, the dataset and T_ion, and re-used in 
+    subsequent calls. Cache files written by a different version of the 
+    source code or of numpy are removed.
+
+    Parameters
+    ----------
+    T_ion : array
+        energy in keV (see cross_section_NRL and cross_section_Bosch)
+    dataset : str
+        'Bosch' or 'NRL'
+    refresh : boolean
+        if True, ignore the cached cross sections and calculate them again
 
-    # return cross-section in barn
-    return sigma_T*1e-3
+    Returns
+    -------
+    sigma_T: array
+        Total cross section in barns of D+D, D+T, D+3He, 
+        shape (3,) + T_ion.shape
+    """
 
+    T_ion = np.asarray( T_ion, dtype=np.float64 )
+
+    if dataset not in ('NRL', 'Bosch'):
+        print( 'ERROR: dataset {0} not available'.format(dataset) )
+        return np.full( (3,) + T_ion.shape, np.nan )
+
+    # the source code (containing the coefficients and the formulas) and the 
+    # numpy version identify the code version, dataset and T_ion the values
+    hash_obj = hashlib.blake2b( digest_size=8 )
+    with open( __file__, 'rb' ) as f:
+        hash_obj.update( f.read() )
+    hash_obj.update( np.__version__.encode() )
+    code_key = hash_obj.hexdigest()
+    key = hashlib.blake2b( (dataset + repr(T_ion.shape)).encode() + T_ion.tobytes(),
+                           digest_size=8 ).hexdigest()
+    cache_dir = os.path.join( os.environ.get( 'XDG_CACHE_HOME', 
+                                              os.path.join( os.path.expanduser('~'), '.cache' ) ),
+                              'fusion_plots' )
+    fname_cache = os.path.join( cache_dir, 'cross_sections_{0}_{1}.npz'.format(code_key, key) )
+
+    # if available, use the cached cross sections
+    if os.path.isfile( fname_cache ) and not refresh:
+        with np.load( fname_cache ) as cache:
+            return cache['sigma_T']
+
+    # (all reactions evaluated in one pass)
+    if dataset == 'NRL':
+        sigma_T     = cross_section_NRL_batch(T_ion, ['DD_a', 'DD_b', 'DT', 'DHe3'])
+        sigma_T[0] += sigma_T[1]
+        sigma_T     = sigma_T[[0,2,3]]
+    elif dataset == 'Bosch':
+        sigma_T     = cross_section_Bosch_batch(T_ion, ['DD', 'DT', 'DHe3'])
+
+    # cache the cross sections, such that they do not need to be calculated again
+    # (cache files of other code versions are stale and removed)
+    try:
+        os.makedirs( cache_dir, exist_ok=True )
+        for fname in os.listdir( cache_dir ):
+            if fname.startswith( 'cross_sections_' ) and not fname.startswith( 'cross_sections_' + code_key ):
+                os.remove( os.path.join( cache_dir, fname ) )
+        np.savez( fname_cache, sigma_T=sigma_T )
+    except OSError:
+        print( 'WARNING: could not write cache file {0}'.format(fname_cache) )
+
+    return sigma_T
 #;}}}
 
+
 #%%
-# keV <-> K conversions for upper x-axis
+# keV <-> K conversions for upper x-axis (in units of million K), 
+# conversion factor evaluated only once
+MK_per_keV = consts.e/consts.Boltzmann/1e3
 def keV_to_K(keV):
-    return keV/consts.Boltzmann*consts.e/1e3
+    return keV*MK_per_keV
 def K_to_keV(K):
-    return K*consts.Boltzmann/consts.e*1e3
+    return K/MK_per_keV
 
 
 def make_plot( fname_plot='' ):
@@ -153,6 +336,7 @@ def make_plot( fname_plot='' ):
     -------
     '''
 
+    import matplotlib.pyplot as plt
 
     if len(fname_plot) > 0:
         plt.savefig( fname_plot, dpi=600, bbox_inches='tight' )
@@ -175,22 +359,30 @@ def main():
     #   'NRL'
     dataset = 'Bosch'
 
+    # empty string results in plot into window, otherwise into file
+    fname_plot  = 'cross_sections_vs_temperature__{0}.png'.format(dataset)
+
+    # matplotlib is only imported here, such that the cross-section functions of 
+    # this module can be imported without initializing matplotlib;
+    # plot into file only: non-interactive backend, no GUI toolkit needs to be loaded
+    import matplotlib
+    if len(fname_plot) > 0:
+        matplotlib.use( 'Agg' )
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker
+
     # ion temperature in units of keV 
     # (actually energy, but in plasma physics we just call it temperature :-)
-    T_ion = np.logspace(0, 3, 501)
+    # (201 samples are sufficient for a smooth line in the log-log plot)
+    T_ion = np.logspace(0, 3, 201)
 
     # 1 barn = 1e-24 cm^2 = 1e-28 m^2
     barns_to_SI = 1e-28
 
-    # get cross section
-    if dataset == 'NRL':
-        sigma_DD    = barns_to_SI*(cross_section_NRL(T_ion, 'DD_a') + cross_section_NRL(T_ion, 'DD_b'))
-        sigma_DT    = barns_to_SI*cross_section_NRL(T_ion, 'DT')
-        sigma_DHe3  = barns_to_SI*cross_section_NRL(T_ion, 'DHe3')
-    elif dataset == 'Bosch':
-        sigma_DD    = barns_to_SI*cross_section_Bosch(T_ion, reaction='DD') 
-        sigma_DT    = barns_to_SI*cross_section_Bosch(T_ion, reaction='DT')
-        sigma_DHe3  = barns_to_SI*cross_section_Bosch(T_ion, reaction='DHe3')
+    # get cross section (scaled in-place)
+    sigma  = get_cross_sections(T_ion, dataset=dataset)
+    sigma *= barns_to_SI
+    sigma_DD, sigma_DT, sigma_DHe3 = sigma
 
     if dataset == 'NRL':
         xlabel  = 'Deuteron energy in keV'
@@ -227,7 +419,7 @@ def main():
     ax2.tick_params(axis='both', which='both', direction='in', top=True,  right=False)
 
     # fig.text( .71, .98, credit_str, fontsize=7)
-    make_plot( fname_plot='cross_sections_vs_temperature__{0}.png'.format(dataset) )
+    make_plot( fname_plot=fname_plot )
 #;}}}
 
 
@@ -235,12 +427,13 @@ def main_test():
 
     T_ion = np.array( [3, 4, 5, 6, 7, 8, 9, 10, 100, 400 ] )
 
-    for ii in range(len(T_ion)):
-        print( ' T_ion = {0:3.0f} keV  ==>  sigma = {1:9.3e}'.format(
-               T_ion[ii], cross_section_Bosch( T_ion[ii], reaction='DT' ) ) )
-#               T_ion[ii], cross_section_Bosch( T_ion[ii], reaction='He3D' ) ) )
-#               T_ion[ii], cross_section_Bosch( T_ion[ii], reaction='DD_a' ) ) )
-#               T_ion[ii], cross_section_Bosch( T_ion[ii], reaction='DD_b' ) ) )
+    sigma = cross_section_Bosch( T_ion, reaction='DT' )
+#    sigma = cross_section_Bosch( T_ion, reaction='He3D' )
+#    sigma = cross_section_Bosch( T_ion, reaction='DD_a' )
+#    sigma = cross_section_Bosch( T_ion, reaction='DD_b' )
+
+    for T, sig in zip( T_ion, sigma ):
+        print( ' T_ion = {0:3.0f} keV  ==>  sigma = {1:9.3e}'.format( T, sig ) )
 
 if __name__ == '__main__':
     main()
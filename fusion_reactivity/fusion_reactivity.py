@@ -13,18 +13,12 @@ __copyright__   = 'University of Stuttgart'
 __license__     = 'MIT'
 
 # import standard modules
+import bisect
+import functools
+import math
 import numpy as np
 import matplotlib.pyplot as plt
 import scipy.constants as consts
-import scipy.interpolate as interp
-
-# change some default properties of matplotlib
-plt.rcParams.update( {'font.size':12} )
-# force ticks to point inwards
-plt.rcParams['xtick.direction'] = 'in'
-plt.rcParams['ytick.direction'] = 'in'
-plt.rcParams['xtick.top']       = True
-plt.rcParams['ytick.right']     = True
 
 
 def make_plot( fname_plot='' ):
@@ -51,6 +45,19 @@ def make_plot( fname_plot='' ):
 #;}}}
 
 
+# reaction numbers used throughout this file, see reaction_int2str
+reaction_dict = { 1 : 'DT'  , 
+                  2 : 'DD_a',
+                  3 : 'DD_b',
+                  4 : '3HeD',
+                  5 : 'TT',
+                  6 : 'T3He',
+                  7 : '3He3He',
+                  8 : 'p11B',
+                  9 : 'pp',
+                 }
+
+
 def reaction_int2str( reaction_int, silent=True ):
 #;{{{
     """
@@ -87,22 +94,9 @@ def reaction_int2str( reaction_int, silent=True ):
 
     func_name = 'reaction_int'
 
-    reaction_dict = { 1 : 'DT'  , 
-                      2 : 'DD_a',
-                      3 : 'DD_b',
-                      4 : '3HeD',
-                      5 : 'TT',
-                      6 : 'T3He',
-                      7 : '3He3He',
-                      8 : 'p11B',
-                      9 : 'pp',
-                     }
-
     # check if reaction_int is in keys of dict, return NaN if not
-    if reaction_int in reaction_dict.keys():
-        reaction_str = reaction_dict[ reaction_int ]
-    else:
-        reaction_str = 'NaN'
+    reaction_str = reaction_dict.get( reaction_int, 'NaN' )
+    if reaction_str == 'NaN':
         print( '{0}: ERROR, no reaction for found for provided key'.format( func_name ) )
         print( '{0}  key was {1}'.format( ' '*len(func_name), reaction_int ) )
 
@@ -115,6 +109,127 @@ def reaction_int2str( reaction_int, silent=True ):
 #;}}}
 
 
+def format_values( values ):
+#;{{{
+    """
+    Return a short string of a scalar or array for console output.
+
+    Long arrays are summarized by their first and last elements, such that
+    printing them does not produce (and format) thousands of numbers.
+
+    Parameters
+    ----------
+    values: float or np.array
+
+    Returns
+    -------
+    str
+    """
+
+    return np.array2string( np.asarray(values), threshold=6, edgeitems=3, 
+                            max_line_width=200 )
+
+#;}}}
+
+
+# conversion of the reactivity from cm^3/s to m^3/s, as natural logarithm
+log_cm3_to_m3 = math.log( 1e-6 )
+
+# 10**x is evaluated as exp(x*ln(10)), which is faster for arrays
+ln10 = math.log( 10. )
+
+
+# coefficients of the fit equation in Hively NF 1977 paper, per reaction:
+#   a1, r, [a2, a3, a4, a5, a6]
+Hively_coefficients = {
+    # Table I in Hively NF 1977 paper
+    'DT':   ( -21.377692, .2935,
+              np.array( [ -25.204054, -7.1013427e-2, 1.9375451e-4, 4.9246592e-6, -3.9836572e-8 ] ) ),
+    # Table III in Hively NF1977 paper
+    'DD_a': ( -15.511891, .3735,
+              np.array( [ -35.318711, -1.2904737e-2, 2.6797766e-4, -2.9198685e-6, 1.2748415e-8 ] ) ),
+    # Tabel IV in Hively NF1977 paper
+    'DD_b': ( -15.993842, .3725,
+              np.array( [ -35.017640, -1.3689787e-2, 2.7089621e-4, -2.9441547e-6, 1.2841202e-8 ] ) ),
+    # Table II in Hively NF1977 paper
+    '3HeD': ( -27.764468, .3597,
+              np.array( [ -31.023898, 2.7809999e-2, -5.5321633e-4, 3.0293927e-6, -2.5233325e-9 ] ) ),
+    }
+Hively_coefficients['TD']   = Hively_coefficients['DT']
+Hively_coefficients['D3He'] = Hively_coefficients['3HeD']
+# same, but keyed directly by the reaction number
+Hively_coefficients_by_int = { reaction: Hively_coefficients[reaction_str] 
+                               for reaction, reaction_str in reaction_dict.items()
+                               if reaction_str in Hively_coefficients }
+# all coefficients stacked into one contiguous array, one row per reaction
+# with columns a1, r, a2, ..., a6, row index given by Hively_rows
+Hively_rows = { reaction: row for row, reaction in enumerate( Hively_coefficients_by_int ) }
+Hively_coefficient_matrix = np.array( [ (a1, r) + tuple(poly) 
+                                        for a1, r, poly in Hively_coefficients_by_int.values() ] )
+
+
+def make_reactivity_Hively( a1, r, poly ):
+#;{{{
+    """
+    Return the fit function of Hively NF 1977 for one reaction.
+
+    The coefficients are fixed in the returned function, such that 
+    no look-up of the reaction is required when it is called.
+
+    Parameters
+    ----------
+    a1: float
+    r: float
+    poly: np.array
+        coefficients a2, ..., a6
+
+    Returns
+    -------
+    function
+        fusion reactivity in m^3/s as function of T_ion in keV
+    """
+
+    # (scaling from cm^3/s to m^3/s folded into the exponent, exp(x)*1e-6 = exp(x+ln(1e-6)))
+    a2, a3, a4, a5, a6 = poly
+    a2 += log_cm3_to_m3
+
+    def reactivity( T_ion ):
+        if isinstance( T_ion, (float, int) ) and T_ion > 0:
+            # scalar T_ion (e.g. when called from within a solver):
+            # plain float arithmetic avoids the overhead of numpy's ufuncs
+            # (large exponents are left to numpy, which returns inf)
+            exponent = a1*T_ion**(-r) + a2 + T_ion*(a3 + T_ion*(a4 + T_ion*(a5 + T_ion*a6)))
+            if exponent < 700.:
+                return math.exp( exponent )
+
+        # Eq. (5), referred to as S_5 in the paper, evaluated in-place in two
+        # buffers to avoid temporary arrays (at least 1D, such that this also 
+        # works for scalars); polynomial part a2 + a3*T + a4*T^2 + a5*T^3 + a6*T^4 
+        # in Horner form
+        T        = np.atleast_1d( np.asarray( T_ion, dtype=np.float64 ) )
+        sigma_v  = a6 * T
+        sigma_v += a5
+        sigma_v *= T
+        sigma_v += a4
+        sigma_v *= T
+        sigma_v += a3
+        sigma_v *= T
+        sigma_v += a2
+        T_pow    = np.power( T, -r )
+        T_pow   *= a1
+        sigma_v += T_pow
+        np.exp( sigma_v, out=sigma_v )
+        return sigma_v.reshape( np.shape(T_ion) )[()]
+
+    return reactivity
+#;}}}
+
+
+# fit functions, one per reaction number
+Hively_functions = { reaction: make_reactivity_Hively( *coefficients )
+                     for reaction, coefficients in Hively_coefficients_by_int.items() }
+
+
 def get_fusion_reactivity_Hively( T_ion, reaction=1, extrapolate=True, silent=True ):
 #;{{{
     '''
@@ -155,64 +270,35 @@ def get_fusion_reactivity_Hively( T_ion, reaction=1, extrapolate=True, silent=Tr
 
     func_name = 'get_fusion_reactivity_Hively'
 
-    reaction_str = reaction_int2str( reaction, silent=True )
-
     # valid energy range according to paper
     energy_range = [1, 80]
 
     if not silent:
+        reaction_str = reaction_int2str( reaction, silent=True )
         print( '{0}:'.format(func_name) )
         print( '    fusion reactivity as obtained from the following paper:' )
         print( '    L.M. Hively, Nuclear Fusion, Vol. 17, No. 4 (1977)' )
         print( '    (more info in doc-string)' )
-        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, T_ion) )
+        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, 
+               format_values(T_ion)) )
 
     # set the coefficients of the fit equation
-    if reaction_str == 'DT' or reaction_str == 'TD':             
-        # Table I in Hively NF 1977 paper
-        a1 = -21.377692
-        a2 = -25.204054
-        a3 = -7.1013427e-2
-        a4 = 1.9375451e-4
-        a5 = 4.9246592e-6
-        a6 = -3.9836572e-8
-        r  = .2935
-    elif reaction_str == 'DD_a':           
-        # Table III in Hively NF1977 paper
-        a1 = -15.511891
-        a2 = -35.318711
-        a3 = -1.2904737e-2
-        a4 = 2.6797766e-4
-        a5 = -2.9198685e-6
-        a6 = 1.2748415e-8
-        r  = .3735
-    elif reaction_str == 'DD_b':
-        # Tabel IV in Hively NF1977 paper
-        a1 = -15.993842         
-        a2 = -35.017640
-        a3 = -1.3689787e-2
-        a4 = 2.7089621e-4
-        a5 = -2.9441547e-6
-        a6 = 1.2841202e-8
-        r  = .3725
-    elif reaction_str == '3HeD' or reaction_str == 'D3He':
-        # Table II in Hively NF1977 paper
-        a1 = -27.764468
-        a2 = -31.023898
-        a3 = 2.7809999e-2
-        a4 = -5.5321633e-4
-        a5 = 3.0293927e-6
-        a6 = -2.5233325e-9
-        r  = .3597
-
-    # Eq. (5), referred to as S_5 in the paper
-    sigma_v = 1e-6 * np.exp( a1/T_ion**r + a2 + a3*T_ion + a4*T_ion**2 + a5*T_ion**3 + a6*T_ion**4 )
+    if reaction not in Hively_functions:
+        print( '{0}: ERROR, no such reaction ({1})'.format( func_name, reaction ) )
+        return np.nan
+
+    sigma_v = Hively_functions[ reaction ]( T_ion )
 
     if not silent:
-        print( '    ==> <sigma*v> = {0} m^3/s'.format(sigma_v) )
+        print( '    ==> <sigma*v> = {0} m^3/s'.format(format_values(sigma_v)) )
 
-    # check if T_ion is within valid energy range
-    if (np.amin(T_ion) < energy_range[0]) or (np.amax(T_ion) > energy_range[1]):
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
         print( '{0}:'.format(func_name) )
         print( '    WARNING: T_ion is outside of valid energy range' )
         if extrapolate:
@@ -224,8 +310,8 @@ def get_fusion_reactivity_Hively( T_ion, reaction=1, extrapolate=True, silent=Tr
 
             # if T_ion is array, set all values outside of range to NaN
             if np.size(T_ion) > 1:
-                sigma_v[ T_ion < energy_range[0] ] = np.nan
-                sigma_v[ T_ion > energy_range[1] ] = np.nan
+                np.putmask( sigma_v, (T_ion < energy_range[0]) | (T_ion > energy_range[1]), 
+                            np.nan )
             else:
                 sigma_v = np.nan
 
@@ -233,6 +319,193 @@ def get_fusion_reactivity_Hively( T_ion, reaction=1, extrapolate=True, silent=Tr
 #;}}}
 
 
+def get_fusion_reactivity_Hively_batch( T_ion, reactions=(1,2,3,4), extrapolate=True, silent=True ):
+#;{{{
+    '''
+    Same as get_fusion_reactivity_Hively, but for several reactions at once,
+    with the coefficients of all reactions stacked into arrays and evaluated
+    in one broadcasted expression.
+
+    Parameters
+    ----------
+    T_ion: float or array
+        ion temperature in keV, valid range 1-80 keV
+    reactions: list of int
+        reactions considered, see reaction_int2str
+    extrapolate: bool
+        if True, T_ion outside of valid energy range (according to paper)
+        will be extrapolated; if false those values will be set to NaN
+    silent: bool
+        if False, a warning is printed for T_ion outside of valid energy range
+
+    Returns
+    -------
+    array
+        fusion reactivity in m^3/s, shape (len(reactions),) + T_ion.shape
+    '''
+
+    func_name = 'get_fusion_reactivity_Hively_batch'
+
+    # valid energy range according to paper
+    energy_range = [1, 80]
+
+    shape = (len(reactions),) + np.shape(T_ion)
+
+    for reaction in reactions:
+        if reaction not in Hively_rows:
+            print( '{0}: ERROR, no such reaction ({1})'.format( func_name, reaction ) )
+            return np.full( shape, np.nan )
+
+    # coefficients of all reactions, a1 and r as columns, shape (len(reactions), 1)
+    coeffs = Hively_coefficient_matrix[ [ Hively_rows[reaction] for reaction in reactions ] ]
+    a1     = coeffs[:,0:1]
+    r      = coeffs[:,1:2]
+    poly   = coeffs[:,2:]
+
+    # scaling from cm^3/s to m^3/s folded into the exponent, exp(x)*1e-6 = exp(x+ln(1e-6))
+    poly[:,0] += log_cm3_to_m3
+
+    T_ion = np.ravel( T_ion )
+
+    # Eq. (5), polyval returns shape (len(reactions), len(T_ion))
+    # T^(-r) = exp(-r*log(T)), such that log(T) is evaluated only once for all reactions
+    sigma_v  = np.polynomial.polynomial.polyval( T_ion, poly.T )
+    T_pow    = np.multiply( -r, np.log( T_ion ) )
+    np.exp( T_pow, out=T_pow )
+    T_pow   *= a1
+    sigma_v += T_pow
+    np.exp( sigma_v, out=sigma_v )
+
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
+        print( '{0}:'.format(func_name) )
+        print( '    WARNING: T_ion is outside of valid energy range' )
+        if extrapolate:
+            print( '{0}extrapolate was set to True (data will be extrapolated)'.format( 
+                   ' '*13) )
+        else:
+            print( '{0}extrapolate was set to False (data will be set to NaN)'.format( 
+                   ' '*13) )
+            sigma_v[ :, (T_ion < energy_range[0]) | (T_ion > energy_range[1]) ] = np.nan
+
+    return sigma_v.reshape( shape )
+#;}}}
+
+
+# coefficients of the fit equation in Bosch & Hale NF 1992 paper, per reaction:
+#   B_G, m_r*c^2, [C1, C2, C3, C4, C5, C6, C7]
+Bosch_coefficients = {
+    # C7 is 1.36600e-5 in Table VII of the paper, but set to zero here
+    'DT':   ( 34.3827, 1124656.,
+              ( 1.17302e-9, 1.51361e-2, 7.51886e-2, 4.60643e-3, 1.35000e-2, -1.06750e-4, .0 ) ),
+    'DD_a': ( 31.3970, 937814.,
+              ( 5.65718e-12, 3.41267e-3, 1.99167e-3, .0, 1.05060e-5, .0, .0 ) ),
+    'DD_b': ( 31.3970, 937814.,
+              ( 5.43360e-12, 5.85778e-3, 7.68222e-3, .0, -2.96400e-6, .0, .0 ) ),
+    '3HeD': ( 68.7508, 1124572.,
+              ( 5.51036e-10, 6.41918e-3, -2.02896e-3, -1.91080e-5, 1.35776e-4, .0, .0 ) ),
+    }
+Bosch_coefficients['TD']   = Bosch_coefficients['DT']
+Bosch_coefficients['D3He'] = Bosch_coefficients['3HeD']
+# same, but keyed directly by the reaction number
+Bosch_coefficients_by_int = { reaction: Bosch_coefficients[reaction_str] 
+                              for reaction, reaction_str in reaction_dict.items()
+                              if reaction_str in Bosch_coefficients }
+# all coefficients stacked into one contiguous array, one row per reaction
+# with columns b_G, mr_c2, C1, ..., C7, row index given by Bosch_rows
+Bosch_rows = { reaction: row for row, reaction in enumerate( Bosch_coefficients_by_int ) }
+Bosch_coefficient_matrix = np.array( [ (b_G, mr_c2) + c 
+                                       for b_G, mr_c2, c in Bosch_coefficients_by_int.values() ] )
+
+
+def make_reactivity_Bosch( b_G, mr_c2, c ):
+#;{{{
+    """
+    Return the fit function of Bosch & Hale NF 1992 for one reaction.
+
+    The coefficients are fixed in the returned function, such that 
+    no look-up of the reaction is required when it is called.
+
+    Parameters
+    ----------
+    b_G: float
+    mr_c2: float
+    c: tuple
+        coefficients C1, ..., C7
+
+    Returns
+    -------
+    function
+        fusion reactivity in m^3/s as function of T_ion in keV
+    """
+
+    c1, c2, c3, c4, c5, c6, c7 = c
+    b_G2_4 = b_G*b_G/4.
+
+    def reactivity( T_ion ):
+        if isinstance( T_ion, (float, int) ):
+            # scalar T_ion (e.g. when called from within a solver):
+            # plain float arithmetic avoids the overhead of numpy's ufuncs
+            # Eq. (13), numerator and denominator in Horner form
+            theta_num = c2 + T_ion*(c4 + T_ion*c6)
+            theta_den = 1. + T_ion*(c3 + T_ion*(c5 + T_ion*c7))
+            theta = T_ion / ( 1. - T_ion*theta_num/theta_den )
+            if theta > 0:
+                chi = ( b_G2_4/theta )**(1./3.)
+                return c1 * theta * math.sqrt( chi/(mr_c2*T_ion*T_ion*T_ion) ) * math.exp(-3.*chi) * 1e-6
+
+        # arrays are evaluated in-place in three buffers to avoid temporary 
+        # arrays (at least 1D, such that this also works for scalars)
+        T = np.atleast_1d( np.asarray( T_ion, dtype=np.float64 ) )
+
+        # Eq. (13), numerator (times T) and denominator in Horner form
+        theta_den  = c7 * T
+        theta_den += c5
+        theta_den *= T
+        theta_den += c3
+        theta_den *= T
+        theta_den += 1.
+        theta      = c6 * T
+        theta     += c4
+        theta     *= T
+        theta     += c2
+        theta     *= T
+        theta     /= theta_den
+        np.subtract( 1., theta, out=theta )
+        np.divide( T, theta, out=theta )
+
+        # Eq. (14), re-using the buffer of the denominator
+        chi = np.divide( b_G2_4, theta, out=theta_den )
+        np.cbrt( chi, out=chi )
+
+        # reactivity as given in the paper in units of cm^3/s (with T_ion in keV)
+        # Eq. (12), scaled to m^3/s via the (scalar) prefactor
+        sigma_v  = T * T
+        sigma_v *= T
+        sigma_v *= mr_c2
+        np.divide( chi, sigma_v, out=sigma_v )
+        np.sqrt( sigma_v, out=sigma_v )
+        sigma_v *= theta
+        chi     *= -3.
+        np.exp( chi, out=chi )
+        sigma_v *= chi
+        sigma_v *= 1e-6*c1
+        return sigma_v.reshape( np.shape(T_ion) )[()]
+
+    return reactivity
+#;}}}
+
+
+# fit functions, one per reaction number
+Bosch_functions = { reaction: make_reactivity_Bosch( *coefficients )
+                    for reaction, coefficients in Bosch_coefficients_by_int.items() }
+
+
 def get_fusion_reactivity_Bosch( T_ion, reaction=1, extrapolate=True, silent=True ):
 #;{{{
 
@@ -268,78 +541,38 @@ def get_fusion_reactivity_Bosch( T_ion, reaction=1, extrapolate=True, silent=Tru
 
     func_name = 'get_fusion_reactivity_Bosch'
 
-    reaction_str = reaction_int2str( reaction, silent=silent )
-
     # valid energy range according to paper
     energy_range = [.2, 100]
 
     if not silent:
+        reaction_str = reaction_int2str( reaction, silent=silent )
         print( '{0}:'.format(func_name) )
         print( '    fusion reactivity as obtained from the following paper:' )
         print( '    H.-S. Bosch and G.M. Hale, Nuclear Fusion, Vol. 32, No. 4 (1992)')
         print( '    (more info in doc-string)' )
-        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, T_ion) )
-
-    if reaction_str == 'DT' or reaction_str == 'TD':
-        b_G     = 34.3827
-        mr_c2   = 1124656.
-        c1      = 1.17302e-9
-        c2      = 1.51361e-2
-        c3      = 7.51886e-2
-        c4      = 4.60643e-3
-        c5      = 1.35000e-2
-        c6      = -1.06750e-4
-        c7      = 1.36600e-5
-        c7      = .0
-    elif reaction_str == 'DD_a':
-        b_G     = 31.3970
-        mr_c2   = 937814.
-        c1      = 5.65718e-12
-        c2      = 3.41267e-3
-        c3      = 1.99167e-3
-        c4      = .0
-        c5      = 1.05060e-5
-        c6      = .0
-        c7      = .0
-    elif reaction_str == 'DD_b':
-        b_G     = 31.3970
-        mr_c2   = 937814.
-        c1      = 5.43360e-12
-        c2      = 5.85778e-3
-        c3      = 7.68222e-3
-        c4      = .0
-        c5      = -2.96400e-6
-        c6      = .0
-        c7      = .0
-    elif reaction_str == '3HeD' or reaction_str == 'D3He':
-        b_G     = 68.7508
-        mr_c2   = 1124572.
-        c1      = 5.51036e-10
-        c2      = 6.41918e-3
-        c3      = -2.02896e-3
-        c4      = -1.91080e-5
-        c5      = 1.35776e-4
-        c6      = .0
-        c7      = .0
-
-    # Eq. (13)
-    theta = T_ion / ( 1. - T_ion*(c2+T_ion*(c4+T_ion*c6)) / (1.+T_ion*(c3+T_ion*(c5+T_ion*c7))) )
+        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, 
+               format_values(T_ion)) )
 
-    # Eq. (14)
-    chi   = ( b_G**2/(4.*theta) )**(1./3.)
+    if reaction not in Bosch_functions:
+        print( '{0}: ERROR, no such reaction ({1})'.format( func_name, reaction ) )
+        return np.nan
 
-    # reactivity as given in the paper in units of cm^3/s (with T_ion in keV)
-    # Eq. (12)
-    sigma_v = c1 * theta * np.sqrt( chi/(mr_c2*T_ion**3) ) * np.exp(-3.*chi)
+    sigma_v = Bosch_functions[ reaction ]( T_ion )
 
-    # scale to m^3/s
-    sigma_v *= 1e-6
+    is_scalar = isinstance( T_ion, (float, int) )
 
     if not silent:
-        print( '    ==> <sigma*v> = {0} m^3/s'.format(sigma_v) )
-
-    # check if T_ion is within valid energy range
-    if (np.amin(T_ion) < energy_range[0]) or (np.amax(T_ion) > energy_range[1]):
+        print( '    ==> <sigma*v> = {0} m^3/s'.format(format_values(sigma_v)) )
+
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    elif is_scalar:
+        T_min = T_max = T_ion
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
         print( '{0}:'.format(func_name) )
         print( '    WARNING: T_ion is outside of valid energy range' )
         if extrapolate:
@@ -351,8 +584,8 @@ def get_fusion_reactivity_Bosch( T_ion, reaction=1, extrapolate=True, silent=Tru
 
             # if T_ion is array, set all values outside of range to NaN
             if np.size(T_ion) > 1:
-                sigma_v[ T_ion < energy_range[0] ] = np.nan
-                sigma_v[ T_ion > energy_range[1] ] = np.nan
+                np.putmask( sigma_v, (T_ion < energy_range[0]) | (T_ion > energy_range[1]), 
+                            np.nan )
             else:
                 sigma_v = np.nan
 
@@ -360,15 +593,98 @@ def get_fusion_reactivity_Bosch( T_ion, reaction=1, extrapolate=True, silent=Tru
 #;}}}
 
 
+def get_fusion_reactivity_Bosch_batch( T_ion, reactions=(1,2,3,4), extrapolate=True, silent=True ):
+#;{{{
+    '''
+    Same as get_fusion_reactivity_Bosch, but for several reactions at once,
+    with the coefficients of all reactions stacked into arrays and evaluated
+    in one broadcasted expression.
+
+    Parameters
+    ----------
+    T_ion: float or array
+        ion temperature in keV, valid range 0.2-100 keV
+    reactions: list of int
+        reactions considered, see reaction_int2str
+    extrapolate: bool
+        if True, T_ion outside of valid energy range (according to paper)
+        will be extrapolated; if false those values will be set to NaN
+    silent: bool
+        if False, a warning is printed for T_ion outside of valid energy range
+
+    Returns
+    -------
+    array
+        fusion reactivity in m^3/s, shape (len(reactions),) + T_ion.shape
+    '''
+
+    func_name = 'get_fusion_reactivity_Bosch_batch'
+
+    # valid energy range according to paper
+    energy_range = [.2, 100]
+
+    shape = (len(reactions),) + np.shape(T_ion)
+
+    for reaction in reactions:
+        if reaction not in Bosch_rows:
+            print( '{0}: ERROR, no such reaction ({1})'.format( func_name, reaction ) )
+            return np.full( shape, np.nan )
+
+    # coefficients of all reactions as columns, shape (len(reactions), 1) each
+    coeffs = Bosch_coefficient_matrix[ [ Bosch_rows[reaction] for reaction in reactions ] ]
+    b_G    = coeffs[:,0:1]
+    mr_c2  = coeffs[:,1:2]
+    c      = coeffs[:,2:].T[:,:,None]
+
+    T_ion = np.ravel( T_ion )
+
+    # Eq. (13)
+    theta_num = c[1] + T_ion*(c[3] + T_ion*c[5])
+    theta_den = 1. + T_ion*(c[2] + T_ion*(c[4] + T_ion*c[6]))
+    theta = T_ion / ( 1. - T_ion*theta_num/theta_den )
+
+    # Eq. (14)
+    chi   = np.cbrt( b_G**2/(4.*theta) )
+
+    # Eq. (12), scaled from cm^3/s to m^3/s
+    sigma_v = (1e-6*c[0]) * theta * np.sqrt( chi/(mr_c2*T_ion*T_ion*T_ion) ) * np.exp(-3.*chi)
+
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
+        print( '{0}:'.format(func_name) )
+        print( '    WARNING: T_ion is outside of valid energy range' )
+        if extrapolate:
+            print( '{0}extrapolate was set to True (data will be extrapolated)'.format( 
+                   ' '*13) )
+        else:
+            print( '{0}extrapolate was set to False (data will be set to NaN)'.format( 
+                   ' '*13) )
+            sigma_v[ :, (T_ion < energy_range[0]) | (T_ion > energy_range[1]) ] = np.nan
+
+    return sigma_v.reshape( shape )
+#;}}}
+
+
 def log_interp1d(xVals, yVals, kind='linear'):
 #;{{{
     """
-    Wrapper around scipy.interpolate.interp1 for logarithmic datasets.
+    Interpolation for logarithmic datasets.
+
+    Linear interpolation uses np.interp, higher orders a spline
+    (scipy.interpolate.make_interp_spline). Values outside of the data
+    range are extrapolated.
 
     Parameters
     ----------
     xVals: np.array
     yVals: np.array
+    kind: str
+        'linear', 'quadratic', or 'cubic' (spline of order 1, 2, or 3)
 
     Returns
     -------
@@ -376,19 +692,145 @@ def log_interp1d(xVals, yVals, kind='linear'):
     """
 
     logx = np.log10(xVals)
-    logy = np.log10(yVals)
+    with np.errstate( divide='ignore' ):
+        logy = np.log10(yVals)
+    # zeros in the data (log10 = -inf) are replaced by a huge negative number,
+    # such that they can be interpolated and stay zeros when transformed back
+    # (not the most negative float, the slopes in np.interp would overflow)
+    logy[ np.isneginf(logy) ] = -1e300
 
     # interpolate a 1D function to log10 of input-data
-    f_interp_lin = interp.interp1d( logx, logy, kind=kind )
+    if kind == 'linear':
+        # np.interp keeps the end values constant outside of the data range,
+        # add one distant point on either side continuing the first and the
+        # last segment, such that the data is extrapolated linearly
+        slope_lo     = (logy[1] - logy[0]) / (logx[1] - logx[0])
+        slope_hi     = (logy[-1] - logy[-2]) / (logx[-1] - logx[-2])
+        logx_ext     = np.concatenate( ( [logx[0] - 100.], logx, [logx[-1] + 100.] ) )
+        logy_ext     = np.concatenate( ( [logy[0] - 100.*slope_lo], logy, 
+                                         [logy[-1] + 100.*slope_hi] ) )
+        f_interp_lin = lambda logx_new: np.interp( logx_new, logx_ext, logy_ext )
+    else:
+        # imported here, as only needed for this case (scipy.interpolate
+        # takes a while to import)
+        import scipy.interpolate as interp
+        spline_order = { 'quadratic':2, 'cubic':3 }[ kind ]
+        f_interp_lin = interp.make_interp_spline( logx, logy, k=spline_order )
 
     # transform log back to linear scale
-    f_interp_log = lambda x_new: np.power(10., f_interp_lin(np.log10(x_new)) )
+    f_interp_log = lambda x_new: np.exp( ln10*f_interp_lin(np.log10(x_new)) )
 
     return f_interp_log
 #;}}}
 
 
-def get_fusion_reactivity_McNally( T_ion, reaction=1, extrapolate=True, silent=True ):
+# tabulated ion temperatures (keV) and reactivities (m^3/s) from McNally 1979
+McNally_T_ion_tabulated = np.array( [  1, 2, 3, 4, 5, 6, 7, 8, 9
+                                     ,10, 20, 30, 40, 50, 60, 70, 80, 90
+                                     ,100, 200, 300, 400, 500, 600, 700, 800, 900
+                                     ,1000
+                                    ] )
+McNally_sigma_v = {
+    # Table I (page 9, top)
+    'DD_b': np.array( [
+          9.65e-29, 3.04e-27, 1.57e-26, 4.37e-26, 8.97e-26, 1.55e-25, 2.39e-25, 3.42e-25, 4.62e-25
+        , 5.99e-25, 2.65e-24, 5.44e-24, 8.54e-24, 1.10e-23, 1.50e-23, 1.82e-23, 2.13e-23, 2.44e-23
+        , 2.74e-23, 5.32e-23, 7.33e-23, 8.96e-23, 1.03e-22, 1.15e-22, 1.25e-22, 1.34e-22, 1.42e-22
+        , 1.48e-22
+        ] ),
+    # Table I (page 9, bottom)
+    'DD_a': np.array( [
+          9.66e-29, 3.05e-27, 1.57e-26, 4.35e-26, 8.90e-26, 1.53e-25, 2.35e-25, 3.33e-25, 4.48e-25
+        , 5.76e-25, 2.41e-24, 4.76e-24, 7.28e-24, 9.84e-24, 1.24e-23, 1.49e-23, 1.73e-23, 1.97e-23
+        , 2.21e-23, 4.29e-23, 6.00e-23, 7.45e-23, 8.70e-23, 9.75e-23, 1.06e-22, 1.13e-22, 1.18e-22
+        , 1.22e-22
+        ] ),
+    # Table I (page 10, top)
+    'DT': np.array( [
+          6.27e-27, 2.83e-25, 1.81e-24, 5.86e-24, 1.35e-23, 2.53e-23, 4.14e-23, 6.17e-23, 8.57e-23
+        , 1.13e-22, 4.31e-22, 6.65e-22, 7.93e-22, 8.54e-22, 8.76e-22, 8.76e-22, 8.64e-22, 8.46e-22
+        , 8.24e-22, 6.16e-22, 4.90e-22, 4.13e-22, 3.63e-22, 3.28e-22, 3.02e-22, 2.83e-22, 2.68e-22
+        , 2.55e-22
+        ] ),
+    # Table I (page 10, bottom)
+    'TT': np.array( [
+          3.28e-29, 1.68e-27, 1.07e-26, 3.35e-26, 7.42e-26, 1.35e-25, 2.14e-25, 3.12e-25, 4.27e-25
+        , 5.57e-25, 2.37e-24, 4.59e-24, 6.87e-24, 9.12e-24, 1.13e-23, 1.34e-23, 1.55e-23, 1.75e-23
+        , 1.95e-23, 4.267e-23, 6.337e-23, 7.679e-23, 8.384e-23, 8.655e-23, 8.654e-23, 8.454e-23, 8.242e-23
+        , 7.943e-23
+        ] ),
+    # Table I (page 11, top)
+    'T3He': np.array( [
+          .0, .0, .0, .0, .0, .0, .0, .0, .0
+        , 1.156e-26, 2.623e-25, 1.134e-24, 2.805e-24, 5.287e-24, 8.515e-24, 1.24e-23, 1.685e-23, 2.178e-23
+        , 2.712e-23, 9.177e-23, 1.606e-22, 2.256e-22, 2.852e-22, 3.397e-22, 3.895e-22, 4.352e-22, 4.772e-22
+        , 5.161e-22
+        ] ),
+    # Table I (page 11, bottom)
+    '3HeD': np.array( [
+          3.10e-32, 1.41e-29, 2.73e-28, 1.75e-27, 6.46e-27, 1.73e-26, 3.76e-26, 7.15e-26, 1.23e-25
+        , 1.97e-25, 3.26e-24, 1.32e-23, 3.09e-23, 5.37e-23, 7.88e-23, 1.04e-22, 1.27e-22, 1.48e-22
+        , 1.67e-22, 2.52e-22, 2.60e-22, 2.52e-22, 2.42e-22, 2.33e-22, 2.24e-22, 2.18e-22, 2.12e-22
+        , 2.07e-22
+        ] ),
+    '3He3He': np.array( [
+          6.248073e-42, 3.553074e-37, 7.679157e-35, 1.434234e-33, 1.212912e-32, 6.463952e-32, 2.623214e-31
+        , 8.195594e-31, 2.138978e-30, 4.860153e-30, 5.448750e-28, 4.924700e-27, 1.963613e-26, 5.186932e-26
+        , 1.073749e-25, 1.900601e-25, 3.046649e-25, 4.511682e-25, 6.307594e-25, 4.073524e-24, 9.918522e-24
+        , 1.774833e-23, 2.783765e-23, 4.056615e-23, 5.662810e-23, 7.607605e-23, 9.090703e-23, 1.251186e-22
+        ] ),
+    # Table I (page 16, top)
+    'p11B': np.array( [
+          2.22553e-48, 1.23679e-37, 4.84893e-34, 3.48445e-32, 5.14265e-31, 3.43360e-30, 1.45314e-29
+        , 4.64382e-29, 1.24057e-28, 2.93733e-28, 4.71713e-26, 3.96257e-25, 1.40318e-24, 3.50303e-24
+        , 7.15115e-24, 1.26619e-23, 2.01130e-23, 2.93569e-23, 4.00945e-23, 1.62612e-22, 2.39482e-22
+        , 2.79706e-22, 3.03366e-22, 3.19657e-22, 3.32697e-22, 3.44191e-22, 3.54833e-22, 3.64859e-22
+        ] ),
+    }
+McNally_sigma_v['TD'] = McNally_sigma_v['DT']
+McNally_sigma_v['3HeT'] = McNally_sigma_v['T3He']
+McNally_sigma_v['D3He'] = McNally_sigma_v['3HeD']
+McNally_sigma_v['11Bp'] = McNally_sigma_v['p11B']
+# same, but keyed directly by the reaction number
+McNally_sigma_v_by_int = { reaction: McNally_sigma_v[reaction_str] 
+                           for reaction, reaction_str in reaction_dict.items()
+                           if reaction_str in McNally_sigma_v }
+# all tables stacked into one contiguous array in log10 (for log-log interpolation),
+# one row per reaction, row index given by McNally_rows
+McNally_rows = { reaction: row for row, reaction in enumerate( McNally_sigma_v_by_int ) }
+with np.errstate( divide='ignore' ):
+    McNally_log_sigma_v = np.log10( np.stack( list( McNally_sigma_v_by_int.values() ) ) )
+McNally_log_T_ion_tabulated = np.log10( McNally_T_ion_tabulated )
+# same as plain lists, for the evaluation with scalar T_ion
+McNally_log_sigma_v_list    = McNally_log_sigma_v.tolist()
+McNally_log_T_ion_list      = McNally_log_T_ion_tabulated.tolist()
+
+
+@functools.lru_cache( maxsize=None )
+def get_McNally_interpolator( reaction ):
+#;{{{
+    """
+    Return the (cached) interpolating function for the McNally dataset.
+
+    Parameters
+    ----------
+    reaction: int
+        reaction number, see reaction_int2str
+
+    Returns
+    -------
+    function
+        fusion reactivity in m^3/s as function of T_ion in keV
+    """
+
+    # perform PCHIP 1D monotonic cubic interpolation
+    #import scipy.interpolate as interp
+    #return interp.PchipInterpolator( McNally_T_ion_tabulated, McNally_sigma_v_by_int[reaction] )
+    return log_interp1d( McNally_T_ion_tabulated, McNally_sigma_v_by_int[reaction], kind='linear' )
+#;}}}
+
+
+def get_fusion_reactivity_McNally( T_ion, reaction=1, extrapolate=True, silent=True, nearest=False ):
 #;{{{
     '''
     Return the fusion reactivity for various fusion reactions.
@@ -409,6 +851,9 @@ def get_fusion_reactivity_McNally( T_ion, reaction=1, extrapolate=True, silent=T
         will be extrapolated; if false those values will be set to NaN
     silent: bool
         if True, some (useful ?) output will be printed to console
+    nearest: bool
+        if True, no interpolation is performed but the tabulated value at
+        the closest tabulated temperature is returned
 
     Returns
     -------
@@ -418,94 +863,60 @@ def get_fusion_reactivity_McNally( T_ion, reaction=1, extrapolate=True, silent=T
 
     func_name = 'get_fusion_reactivity_McNally'
 
-    reaction_str = reaction_int2str( reaction, silent=silent )
-
     if not silent:
+        reaction_str = reaction_int2str( reaction, silent=silent )
         print( '{0}:'.format(func_name) )
         print( '    fusion reactivity as obtained from the following paper:' )
         print( '    J. Rand McNally, ORNL/TM-6914 (1979)')
         print( '    (more info in doc-string)' )
-        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, T_ion) )
-
-    T_ion_tabulated = np.array( [  1, 2, 3, 4, 5, 6, 7, 8, 9
-                                 ,10, 20, 30, 40, 50, 60, 70, 80, 90
-                                 ,100, 200, 300, 400, 500, 600, 700, 800, 900
-                                 ,1000
-                                ] )
-
-    energy_range = np.array( [ np.amin(T_ion_tabulated), np.amax(T_ion_tabulated) ] )
-
-    if reaction_str == 'DD_b':       
-        # Table I (page 9, top)
-        sigma_v = np.array( [
-              9.65e-29, 3.04e-27, 1.57e-26, 4.37e-26, 8.97e-26, 1.55e-25, 2.39e-25, 3.42e-25, 4.62e-25
-            , 5.99e-25, 2.65e-24, 5.44e-24, 8.54e-24, 1.10e-23, 1.50e-23, 1.82e-23, 2.13e-23, 2.44e-23
-            , 2.74e-23, 5.32e-23, 7.33e-23, 8.96e-23, 1.03e-22, 1.15e-22, 1.25e-22, 1.34e-22, 1.42e-22
-            , 1.48e-22 
-            ] )
-    elif reaction_str == 'DD_a':     
-        # Table I (page 9, bottom)
-        sigma_v = np.array( [
-              9.66e-29, 3.05e-27, 1.57e-26, 4.35e-26, 8.90e-26, 1.53e-25, 2.35e-25, 3.33e-25, 4.48e-25
-            , 5.76e-25, 2.41e-24, 4.76e-24, 7.28e-24, 9.84e-24, 1.24e-23, 1.49e-23, 1.73e-23, 1.97e-23
-            , 2.21e-23, 4.29e-23, 6.00e-23, 7.45e-23, 8.70e-23, 9.75e-23, 1.06e-22, 1.13e-22, 1.18e-22
-            , 1.22e-22
-            ] )
-    elif reaction_str == 'DT' or reaction_str == 'TD':     
-        # Table I (page 10, top)
-        sigma_v = np.array( [
-              6.27e-27, 2.83e-25, 1.81e-24, 5.86e-24, 1.35e-23, 2.53e-23, 4.14e-23, 6.17e-23, 8.57e-23
-            , 1.13e-22, 4.31e-22, 6.65e-22, 7.93e-22, 8.54e-22, 8.76e-22, 8.76e-22, 8.64e-22, 8.46e-22
-            , 8.24e-22, 6.16e-22, 4.90e-22, 4.13e-22, 3.63e-22, 3.28e-22, 3.02e-22, 2.83e-22, 2.68e-22
-            , 2.55e-22
-            ] )
-    elif reaction_str == 'TT':     
-        # Table I (page 10, bottom)
-        sigma_v = np.array( [
-              3.28e-29, 1.68e-27, 1.07e-26, 3.35e-26, 7.42e-26, 1.35e-25, 2.14e-25, 3.12e-25, 4.27e-25
-            , 5.57e-25, 2.37e-24, 4.59e-24, 6.87e-24, 9.12e-24, 1.13e-23, 1.34e-23, 1.55e-23, 1.75e-23
-            , 1.95e-23, 4.267e-23, 6.337e-23, 7.679e-23, 8.384e-23, 8.655e-23, 8.654e-23, 8.454e-23, 8.242e-23
-            , 7.943e-23
-            ] )
-    elif reaction_str == 'T3He' or reaction_str == '3HeT':
-        # Table I (page 11, top)
-        sigma_v = np.array( [
-              .0, .0, .0, .0, .0, .0, .0, .0, .0
-            , 1.156e-26, 2.623e-25, 1.134e-24, 2.805e-24, 5.287e-24, 8.515e-24, 1.24e-23, 1.685e-23, 2.178e-23
-            , 2.712e-23, 9.177e-23, 1.606e-22, 2.256e-22, 2.852e-22, 3.397e-22, 3.895e-22, 4.352e-22, 4.772e-22
-            , 5.161e-22
-            ] )
-    elif reaction_str == 'D3He' or reaction_str == '3HeD':
-        # Table I (page 11, bottom)
-        sigma_v = np.array( [
-              3.10e-32, 1.41e-29, 2.73e-28, 1.75e-27, 6.46e-27, 1.73e-26, 3.76e-26, 7.15e-26, 1.23e-25
-            , 1.97e-25, 3.26e-24, 1.32e-23, 3.09e-23, 5.37e-23, 7.88e-23, 1.04e-22, 1.27e-22, 1.48e-22
-            , 1.67e-22, 2.52e-22, 2.60e-22, 2.52e-22, 2.42e-22, 2.33e-22, 2.24e-22, 2.18e-22, 2.12e-22
-            , 2.07e-22
-            ] )
-    elif reaction_str == '3He3He':
-        sigma_v = np.array( [
-              6.248073e-42, 3.553074e-37, 7.679157e-35, 1.434234e-33, 1.212912e-32, 6.463952e-32, 2.623214e-31
-            , 8.195594e-31, 2.138978e-30, 4.860153e-30, 5.448750e-28, 4.924700e-27, 1.963613e-26, 5.186932e-26
-            , 1.073749e-25, 1.900601e-25, 3.046649e-25, 4.511682e-25, 6.307594e-25, 4.073524e-24, 9.918522e-24
-            , 1.774833e-23, 2.783765e-23, 4.056615e-23, 5.662810e-23, 7.607605e-23, 9.090703e-23, 1.251186e-22
-            ] )
-    elif reaction_str == 'p11B' or reaction_str == '11Bp':
-        # Table I (page 16, top)
-        sigma_v = np.array( [
-              2.22553e-48, 1.23679e-37, 4.84893e-34, 3.48445e-32, 5.14265e-31, 3.43360e-30, 1.45314e-29
-            , 4.64382e-29, 1.24057e-28, 2.93733e-28, 4.71713e-26, 3.96257e-25, 1.40318e-24, 3.50303e-24
-            , 7.15115e-24, 1.26619e-23, 2.01130e-23, 2.93569e-23, 4.00945e-23, 1.62612e-22, 2.39482e-22
-            , 2.79706e-22, 3.03366e-22, 3.19657e-22, 3.32697e-22, 3.44191e-22, 3.54833e-22, 3.64859e-22
-            ] )
+        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, 
+               format_values(T_ion)) )
 
-    # perform PCHIP 1D monotonic cubic interpolation
-    #f_interp_sigmav = interp.PchipInterpolator( T_ion_tabulated, sigma_v )
-    f_interp_sigmav = log_interp1d(T_ion_tabulated, sigma_v, kind='linear')
-    sigma_v         = f_interp_sigmav( T_ion )
+    if reaction not in McNally_sigma_v_by_int:
+        print( '{0}: ERROR, no such reaction ({1})'.format( func_name, reaction ) )
+        return np.nan
 
-    # check if T_ion is within valid energy range
-    if (np.amin(T_ion) < energy_range[0]) or (np.amax(T_ion) > energy_range[1]):
+    energy_range = ( McNally_T_ion_tabulated[0], McNally_T_ion_tabulated[-1] )
+
+    is_scalar = isinstance( T_ion, (float, int) )
+
+    if nearest:
+        # index of the closest tabulated temperature, via binary search for the 
+        # neighbouring tabulated temperatures on both sides
+        i_right   = np.clip( np.searchsorted( McNally_T_ion_tabulated, T_ion ), 
+                             1, len(McNally_T_ion_tabulated)-1 )
+        use_right = ( (McNally_T_ion_tabulated[i_right] - T_ion) 
+                      < (T_ion - McNally_T_ion_tabulated[i_right-1]) )
+        sigma_v   = McNally_sigma_v_by_int[ reaction ][ np.where( use_right, i_right, i_right-1 ) ]
+    elif is_scalar:
+        # scalar T_ion (e.g. when called from within a solver): log-log linear 
+        # interpolation with plain float arithmetic, which avoids the overhead 
+        # of calling the interpolant (zeros in the tables stay zeros)
+        log_T   = math.log10( T_ion )
+        i_right = min( max( bisect.bisect_right( McNally_log_T_ion_list, log_T ), 1 ), 
+                       len(McNally_log_T_ion_list)-1 )
+        weight  = ( (log_T - McNally_log_T_ion_list[i_right-1])
+                    / (McNally_log_T_ion_list[i_right] - McNally_log_T_ion_list[i_right-1]) )
+        left    = McNally_log_sigma_v_list[ McNally_rows[reaction] ][ i_right-1 ]
+        right   = McNally_log_sigma_v_list[ McNally_rows[reaction] ][ i_right ]
+        if left == right:
+            sigma_v = 10.**left
+        else:
+            sigma_v = 10.**( (1.-weight)*left + weight*right )
+    else:
+        # log-log interpolation of the tabulated values, the interpolant is
+        # built once per reaction and reused in subsequent calls
+        sigma_v = get_McNally_interpolator( reaction )( T_ion )
+
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    elif is_scalar:
+        T_min = T_max = T_ion
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
         print( '{0}:'.format(func_name) )
         print( '    WARNING: T_ion is outside of valid energy range' )
         if extrapolate:
@@ -517,8 +928,8 @@ def get_fusion_reactivity_McNally( T_ion, reaction=1, extrapolate=True, silent=T
 
             # if T_ion is array, set all values outside of range to NaN
             if np.size(T_ion) > 1:
-                sigma_v[ T_ion < energy_range[0] ] = np.nan
-                sigma_v[ T_ion > energy_range[1] ] = np.nan
+                np.putmask( sigma_v, (T_ion < energy_range[0]) | (T_ion > energy_range[1]), 
+                            np.nan )
             else:
                 sigma_v = np.nan
 
@@ -529,6 +940,147 @@ def get_fusion_reactivity_McNally( T_ion, reaction=1, extrapolate=True, silent=T
 #;}}}
 
 
+def get_fusion_reactivity_McNally_batch( T_ion, reactions=(1,2,3,4,7,8), extrapolate=True, silent=True ):
+#;{{{
+    '''
+    Same as get_fusion_reactivity_McNally, but for several reactions at once,
+    which are interpolated together on the stacked tables.
+
+    Parameters
+    ----------
+    T_ion: float or array
+        ion temperature in keV, valid range 1-1000 keV
+    reactions: list of int
+        reactions considered, see reaction_int2str
+    extrapolate: bool
+        if True, T_ion outside of valid energy range (according to paper)
+        will be extrapolated; if false those values will be set to NaN
+    silent: bool
+        if False, a warning is printed for T_ion outside of valid energy range
+
+    Returns
+    -------
+    array
+        fusion reactivity in m^3/s, shape (len(reactions),) + T_ion.shape
+    '''
+
+    func_name = 'get_fusion_reactivity_McNally_batch'
+
+    energy_range = np.array( [ McNally_T_ion_tabulated[0], McNally_T_ion_tabulated[-1] ] )
+
+    shape = (len(reactions),) + np.shape(T_ion)
+
+    for reaction in reactions:
+        if reaction not in McNally_sigma_v_by_int:
+            print( '{0}: ERROR, no such reaction ({1})'.format( func_name, reaction ) )
+            return np.full( shape, np.nan )
+
+    # log-log linear interpolation of all reactions at once on the stacked tables,
+    # shape (len(reactions), len(T_ion)); written as weighted sum of the neighbouring
+    # tabulated values, such that zeros in the tables (log10 = -inf) stay zeros
+    T_ion   = np.ravel( T_ion )
+    log_T   = np.log10( T_ion )
+    i_right = np.clip( np.searchsorted( McNally_log_T_ion_tabulated, log_T, side='right' ),
+                       1, len(McNally_log_T_ion_tabulated)-1 )
+    weight  = ( (log_T - McNally_log_T_ion_tabulated[i_right-1])
+                / (McNally_log_T_ion_tabulated[i_right] - McNally_log_T_ion_tabulated[i_right-1]) )
+    tables  = McNally_log_sigma_v[ [ McNally_rows[reaction] for reaction in reactions ] ]
+    left    = tables[ :, i_right-1 ]
+    right   = tables[ :, i_right ]
+    with np.errstate( invalid='ignore' ):
+        sigma_v = np.where( left == right, left, (1.-weight)*left + weight*right )
+    sigma_v *= ln10
+    np.exp( sigma_v, out=sigma_v )
+
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
+        print( '{0}:'.format(func_name) )
+        print( '    WARNING: T_ion is outside of valid energy range' )
+        if extrapolate:
+            print( '{0}extrapolate was set to True (data will be extrapolated)'.format( 
+                   ' '*13) )
+        else:
+            print( '{0}extrapolate was set to False (data will be set to NaN)'.format( 
+                   ' '*13) )
+            sigma_v[ :, (T_ion < energy_range[0]) | (T_ion > energy_range[1]) ] = np.nan
+
+    return sigma_v.reshape( shape )
+#;}}}
+
+
+def get_fusion_reactivity_combined( T_ion, reaction=1, T_switch=100., extrapolate=True, silent=True ):
+#;{{{
+    '''
+    Return the fusion reactivity combining the Bosch fit and the McNally data.
+
+    The fit of Bosch & Hale is only valid up to 100 keV, the tabulated
+    values of McNally extend to 1000 keV. The (cheaper) Bosch fit is
+    used for T_ion <= T_switch, the interpolated McNally data above.
+
+    Parameters
+    ----------
+    T_ion: float or array
+        ion temperature in keV, valid range 0.2-1000 keV
+    reaction: int
+        defines reaction considered, default value is 1
+        possible values are:
+        1: T + D    --> n + 4He     T(d,n)4He
+        2: D + D    --> p + T       D(d,p)T
+        3: D + D    --> n + 3He     D(d,n)3He
+        4: 3He + D  --> p + 4He     3He(d,p)4He
+    T_switch: float
+        ion temperature in keV above which the McNally data is used
+    extrapolate: bool
+        if True, T_ion outside of valid energy range will be extrapolated;
+        if false those values will be set to NaN
+    silent: bool
+        if True, some (useful ?) output will be printed to console
+
+    Returns
+    -------
+    float or array
+        fusion reactivity in m^3/s
+    '''
+
+    func_name = 'get_fusion_reactivity_combined'
+
+    if (reaction not in Bosch_functions) or (reaction not in McNally_rows):
+        print( '{0}: ERROR, no such reaction ({1})'.format( func_name, reaction ) )
+        return np.nan
+
+    if isinstance( T_ion, (float, int) ):
+        if T_ion <= T_switch:
+            return get_fusion_reactivity_Bosch( T_ion, reaction=reaction,
+                                                extrapolate=extrapolate, silent=silent )
+        else:
+            return get_fusion_reactivity_McNally( T_ion, reaction=reaction,
+                                                  extrapolate=extrapolate, silent=silent )
+
+    T_ion   = np.asarray( T_ion, dtype=np.float64 )
+    mask_lo = T_ion <= T_switch
+    mask_hi = ~mask_lo
+
+    sigma_v = np.empty_like( T_ion )
+    if np.any( mask_lo ):
+        sigma_v[ mask_lo ] = get_fusion_reactivity_Bosch( T_ion[ mask_lo ], reaction=reaction,
+                                                          extrapolate=extrapolate, silent=silent )
+    if np.any( mask_hi ):
+        sigma_v[ mask_hi ] = get_fusion_reactivity_McNally( T_ion[ mask_hi ], reaction=reaction,
+                                                            extrapolate=extrapolate, silent=silent )
+
+    return sigma_v
+#;}}}
+
+
+# coefficients of Angulo's analytical fits, A0...A5
+Angulo_coefficients = { 'pp' : ( 4.08e-15, -3.381, 3.82, 1.51, 0.144, -1.14e-2 ) }
+
+
 def get_fusion_reactivity_Angulo( T_ion, reaction=9, reaction_str='', extrapolate=True, silent=True ):
 #;{{{
     """
@@ -573,25 +1125,35 @@ def get_fusion_reactivity_Angulo( T_ion, reaction=9, reaction_str='', extrapolat
         print( '    fusion reactivity as obtained from the following paper:' )
         print( '    C. Angulo et al., Nuclear Physics A 656 (1979) 3-183')
         print( '    (more info in doc-string)' )
-        print( '    reaction {0:d} ({1}), T_ion = {2} keV, T9 = {3} K'.format(reaction, reaction_str, T_ion, T9) )
+        print( '    reaction {0:d} ({1}), T_ion = {2} keV, T9 = {3} K'.format(reaction, reaction_str, 
+               format_values(T_ion), format_values(T9)) )
 
-    if reaction_str == 'pp':
-        A = np.array( [ 4.08e-15, -3.381, 3.82, 1.51, 0.144, -1.14e-2 ] )
+    if reaction_str in Angulo_coefficients:
+        A = Angulo_coefficients[ reaction_str ]
     else:
         print( '{0}: ERROR, no such reaction'.format( func_name ) )
         return np.nan
 
-    sigma_v = 1./consts.Avogadro * A[0]*T9**(-2./3.) * np.exp(A[1]*T9**(-1./3.)) * (
-                1. + A[2]*T9 + A[3]*T9**2 + A[4]*T9**3 + A[5]*T9**4 )
-
-    # scale to m^3/s
-    sigma_v *= 1e-6
+    # evaluate in a single buffer, polynomial
+    # 1 + A2*T9 + A3*T9^2 + A4*T9^3 + A5*T9^4 in Horner form,
+    # constant prefactors (incl. scaling to m^3/s) folded into one factor
+    # T9^(-1/3) via cbrt, T9^(-2/3) as its square
+    T9_inv_cbrt = 1./np.cbrt( T9 )
+    sigma_v  = np.exp( A[1]*T9_inv_cbrt )
+    sigma_v *= T9_inv_cbrt*T9_inv_cbrt
+    sigma_v *= 1. + T9*(A[2] + T9*(A[3] + T9*(A[4] + T9*A[5])))
+    sigma_v *= A[0]/consts.Avogadro * 1e-6
 
     if not silent:
-        print( '    ==> <sigma*v> = {0} m^3/s'.format(sigma_v) )
+        print( '    ==> <sigma*v> = {0} m^3/s'.format(format_values(sigma_v)) )
 
-    # check if T_ion is within valid energy range
-    if (np.amin(T_ion) < energy_range[0]) or (np.amax(T_ion) > energy_range[1]):
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
         print( '{0}:'.format(func_name) )
         print( '    WARNING: T_ion is outside of valid energy range' )
         if extrapolate:
@@ -603,8 +1165,8 @@ def get_fusion_reactivity_Angulo( T_ion, reaction=9, reaction_str='', extrapolat
 
             # if T_ion is array, set all values outside of range to NaN
             if np.size(T_ion) > 1:
-                sigma_v[ T_ion < energy_range[0] ] = np.nan
-                sigma_v[ T_ion > energy_range[1] ] = np.nan
+                np.putmask( sigma_v, (T_ion < energy_range[0]) | (T_ion > energy_range[1]), 
+                            np.nan )
             else:
                 sigma_v = np.nan
 
@@ -613,6 +1175,10 @@ def get_fusion_reactivity_Angulo( T_ion, reaction=9, reaction_str='', extrapolat
 #;}}}
 
 
+# coefficients of Atzeni's analytical fits, A0...A4
+Atzeni_coefficients = { 'pp' : ( 1.56e-37, -14.94, 0.044, 2.03e-4, 5e-7 ) }
+
+
 def get_fusion_reactivity_Atzeni( T_ion, reaction=9, reaction_str='', extrapolate=True, silent=True ):
 #;{{{
     """
@@ -655,22 +1221,32 @@ def get_fusion_reactivity_Atzeni( T_ion, reaction=9, reaction_str='', extrapolat
         print( '    fusion reactivity as obtained from the following paper:' )
         print( '    Atzeni & Meyer-ter-Vehn: Physics of Intertial Fusion (2004)')
         print( '    (more info in doc-string)' )
-        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, T_ion) )
+        print( '    reaction {0:d} ({1}), T_ion = {2} keV'.format(reaction, reaction_str, 
+               format_values(T_ion)) )
 
-    if reaction_str == 'pp':
-        A = np.array( [ 1.56e-37, -14.94, 0.044, 2.03e-4, 5e-7 ] )
+    if reaction_str in Atzeni_coefficients:
+        A = Atzeni_coefficients[ reaction_str ]
     else:
         print( '{0}: ERROR, no such reaction'.format( func_name ) )
         return np.nan
 
-    sigma_v = A[0]*T_ion**(-2./3.) * np.exp(A[1]*T_ion**(-1./3.)) * (
-                1. + A[2]*T_ion + A[3]*T_ion**2 + A[4]*T_ion**2 )
-
-    # scale to m^3/s
-    sigma_v *= 1e-6
-
-    # check if T_ion is within valid energy range
-    if (np.amin(T_ion) < energy_range[0]) or (np.amax(T_ion) > energy_range[1]):
+    # evaluate in a single buffer, polynomial 1 + A2*T + A3*T^2 + A4*T^2 in
+    # Horner form (both A3 and A4 multiply T^2 in the original expression,
+    # kept as is), constant prefactors (incl. scaling to m^3/s) folded
+    # T^(-1/3) via cbrt, T^(-2/3) as its square
+    T_inv_cbrt = 1./np.cbrt( T_ion )
+    sigma_v  = np.exp( A[1]*T_inv_cbrt )
+    sigma_v *= T_inv_cbrt*T_inv_cbrt
+    sigma_v *= 1. + T_ion*(A[2] + T_ion*(A[3] + A[4]))
+    sigma_v *= A[0]*1e-6
+
+    # check if T_ion is within valid energy range (skipped if there is nothing
+    # to report or to set to NaN)
+    if silent and extrapolate:
+        T_min, T_max = energy_range
+    else:
+        T_min, T_max = np.amin(T_ion), np.amax(T_ion)
+    if (T_min < energy_range[0]) or (T_max > energy_range[1]):
         print( '{0}:'.format(func_name) )
         print( '    WARNING: T_ion is outside of valid energy range' )
         if extrapolate:
@@ -682,8 +1258,8 @@ def get_fusion_reactivity_Atzeni( T_ion, reaction=9, reaction_str='', extrapolat
 
             # if T_ion is array, set all values outside of range to NaN
             if np.size(T_ion) > 1:
-                sigma_v[ T_ion < energy_range[0] ] = np.nan
-                sigma_v[ T_ion > energy_range[1] ] = np.nan
+                np.putmask( sigma_v, (T_ion < energy_range[0]) | (T_ion > energy_range[1]), 
+                            np.nan )
             else:
                 sigma_v = np.nan
 
@@ -692,10 +1268,26 @@ def get_fusion_reactivity_Atzeni( T_ion, reaction=9, reaction_str='', extrapolat
 #;}}}
 
 
+def set_plot_style():
+#;{{{
+    """
+    Change the default plot formatting (called from main, such that importing
+    this module does not change the global matplotlib settings).
+    """
+
+    plt.rcParams.update( {'font.size':12} )
+    # force ticks to point inwards
+    plt.rcParams['xtick.direction'] = 'in'
+    plt.rcParams['ytick.direction'] = 'in'
+    plt.rcParams['xtick.top']       = True
+    plt.rcParams['ytick.right']     = True
+#;}}}
+
+
 def main():
 #;{{{
 
-    print
+    set_plot_style()
 
     # possible values for the languare are 'en' and 'de'
     lang    = 'en'
@@ -722,9 +1314,6 @@ def main():
     plot_fname = 'fusion_reactivity_{0}.png'.format(lang)
     #plot_fname  = ''
 
-    # set fusion reaction, see function reaction_int2str
-    reaction = 1
-
     # T_ion in keV
     T_ion = np.linspace(1,1000,1000)
 
@@ -738,42 +1327,34 @@ def main():
 
     if plot_Hively:
         txt_ref_str = 'Hively fit'
-        ax1.plot( T_ion, get_fusion_reactivity_Hively(T_ion, reaction=1), 
-                  label='T(d,n)4He', linewidth=2 )
-        ax1.plot( T_ion, get_fusion_reactivity_Hively(T_ion, reaction=2), 
-                  label='D(d,p)T', linewidth=2 )
-        ax1.plot( T_ion, get_fusion_reactivity_Hively(T_ion, reaction=3),  
-                  label='D(d,n)3He', linewidth=2 )
-        ax1.plot( T_ion, get_fusion_reactivity_Hively(T_ion, reaction=4),  
-                  label='3He(d,p)4He', linewidth=2 )
+        sigma_v = get_fusion_reactivity_Hively_batch( T_ion, reactions=(1,2,3,4) )
+        for ii, label in enumerate( ['T(d,n)4He', 'D(d,p)T', 'D(d,n)3He', '3He(d,p)4He'] ):
+            ax1.plot( T_ion, sigma_v[ii], label=label, linewidth=2 )
 
     if plot_Bosch:
         txt_ref_str = 'Bosch fit'
-        ax1.plot( T_ion, get_fusion_reactivity_Bosch(T_ion, reaction=1),
-                  label='T(d,n)4He', linewidth=3 )
-        ax1.plot( T_ion, get_fusion_reactivity_Bosch(T_ion, reaction=2),
-                  label='D(d,p)T', linewidth=3 )
-        ax1.plot( T_ion, get_fusion_reactivity_Bosch(T_ion, reaction=3),
-                  label='D(d,n)3He', linewidth=3 )
-        ax1.plot( T_ion, get_fusion_reactivity_Bosch(T_ion, reaction=4),
-                  label='3He(d,p)4He', linewidth=3 )
+        sigma_v = get_fusion_reactivity_Bosch_batch( T_ion, reactions=(1,2,3,4) )
+        for ii, label in enumerate( ['T(d,n)4He', 'D(d,p)T', 'D(d,n)3He', '3He(d,p)4He'] ):
+            ax1.plot( T_ion, sigma_v[ii], label=label, linewidth=3 )
 
     if plot_McNally:
         lw_McNally  = 3
         txt_ref_str = 'McNally dataset'
 
-        ax1.plot( T_ion, get_fusion_reactivity_McNally(T_ion, reaction=1), 
+        # reactions 1, 2, 3, 4, 7, 8 interpolated in one go
+        sigma_v = get_fusion_reactivity_McNally_batch( T_ion, reactions=(1,2,3,4,7,8) )
+
+        ax1.plot( T_ion, sigma_v[0], 
                   label='D+T', linewidth=lw_McNally )
-        ax1.plot( T_ion, ( get_fusion_reactivity_McNally(T_ion, reaction=2)
-                          +get_fusion_reactivity_McNally(T_ion, reaction=3)),
+        ax1.plot( T_ion, sigma_v[1]+sigma_v[2],
                   label='D+D', linewidth=lw_McNally )
         #ax1.plot( T_ion, get_fusion_reactivity_McNally(T_ion, reaction=5), 
         #          label='T+T', linewidth=lw_McNally )
-        ax1.plot( T_ion, get_fusion_reactivity_McNally(T_ion, reaction=4), 
+        ax1.plot( T_ion, sigma_v[3], 
                   label=r'D+$^3$He', linewidth=lw_McNally )
-        ax1.plot( T_ion, get_fusion_reactivity_McNally(T_ion, reaction=7), 
+        ax1.plot( T_ion, sigma_v[4], 
                   label=r'$^3$He+$^3$He', linewidth=lw_McNally )
-        ax1.plot( T_ion, get_fusion_reactivity_McNally(T_ion, reaction=8), 
+        ax1.plot( T_ion, sigma_v[5], 
                   label=r'p+$^{11}$B', linewidth=lw_McNally )
 
     if plot_Angulo:
@@ -817,7 +1398,7 @@ def main():
     # the license for the code is mentioned above and in the LICENSE file
     if write_plotcredit:
         credit_str = u'{0}, CC BY-SA 4.0'.format( __author__ )
-        if scr_ratio == '4:3:':
+        if scr_ratio == '4:3':
             credit_x0   = .7
         elif scr_ratio == '16:9':
             credit_x0   = .743
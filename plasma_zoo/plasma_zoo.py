@@ -13,6 +13,7 @@ __copyright__   = 'University of Stuttgart'
 __license__     = 'MIT'
 
 # import standard modules
+import functools
 import matplotlib.pyplot as plt
 import numpy as np
 import scipy.constants as consts
@@ -26,6 +27,18 @@ from matplotlib import ticker
 # note that the license refers only to that specific plot
 # the license for the code is mentioned in the LICENSE file (and above)
 credit_str  = f'{__author__}, CC BY-SA 4.0'
+
+# combinations of physical constants used below, evaluated once
+# conversion of temperature from eV to K
+K_per_eV            = consts.e/consts.k
+# lambda_D^2 = debye_coeff * T/n, with T in K
+debye_coeff         = consts.epsilon_0 * consts.k / consts.e**2
+# T_deg = T_deg_coeff * n^(2/3), in eV
+T_deg_coeff         = consts.hbar**2/(2.*consts.m_e) * (3.*np.pi**2)**(2./3.) / consts.e
+# T_nonideal = T_nonideal_coeff * n^(1/3), in eV
+T_nonideal_coeff    = consts.e/(4.*np.pi*consts.epsilon_0)
+# temperature above which a plasma becomes relativistic, in eV
+T_rel               = consts.m_e*consts.c**2 / consts.e
  
 
 def calc_debye( n=1e20, T=1, unit='eV' ):
@@ -35,23 +48,24 @@ def calc_debye( n=1e20, T=1, unit='eV' ):
 
     Parameters
     ----------
-    n: float
+    n: float or numpy array
         plasma density in m^-3
-    T: float
+    T: float or numpy array
         plasma temperature in K (or eV, see parameter 'unit')
     unit: str
         if set to 'eV', plasma temperature is assumed to be in eV
 
     Returns
     -------
-    float
+    float or numpy array
         Debye length in meters.
     """
 
+    # not in-place, such that an array passed as T is not modified
     if unit == 'eV':
-        T *= consts.e/consts.k
+        T = T * K_per_eV
 
-    return np.sqrt( consts.epsilon_0 * consts.k * T / (consts.e**2 * n) )
+    return np.sqrt( debye_coeff * T / n )
 #;}}}
 
 
@@ -62,16 +76,16 @@ def calc_ND( n=1e20, T=1, unit='eV' ):
 
     Parameters
     ----------
-    n: float
+    n: float or numpy array
         plasma density in m^-3
-    T: float
+    T: float or numpy array
         plasma temperature in K (or eV, see parameter 'unit')
     unit: str
         if set to 'eV', plasma temperature is assumed to be in eV
 
     Returns
     -------
-    float
+    float or numpy array
         Number of particles in Debye sphere.
     """
 
@@ -96,7 +110,7 @@ def calc_Trel():
         Temperature in eV above which the plasma becomes relativitic. 
     """
 
-    return consts.m_e*consts.c**2 / consts.e
+    return T_rel
 #;}}}
 
 
@@ -116,7 +130,11 @@ def calc_Tdeg( plasma_density ):
         temperature in eV
     """
 
-    return consts.hbar**2/(2.*consts.m_e) * (3.*np.pi**2*plasma_density)**(2./3.) / consts.e
+    # n^(2/3) via cbrt (faster than the generic power), squared in-place
+    T_deg  = np.cbrt( plasma_density )
+    T_deg *= T_deg
+    T_deg *= T_deg_coeff
+    return T_deg
 
 #;}}}
 
@@ -138,11 +156,12 @@ def calc_Tnonideal( plasma_density ):
     """
 
     # non-ideal plasmas with strong coupling parameter
-    return consts.e**2/(4.*np.pi*consts.epsilon_0) * plasma_density**(1./3.) / consts.e
+    return T_nonideal_coeff * np.cbrt( plasma_density )
 
 #;}}}
 
 
+@functools.lru_cache( maxsize=None )
 def build_plasma_zoo(lang='en'):
 #;{{{
     """
@@ -153,6 +172,9 @@ def build_plasma_zoo(lang='en'):
     where the first element corresponds to the plasma density,
     the second to the plasma temperature.
 
+    The dictionary is built once per language and cached, it should
+    therefore not be modified in-place (copy it first).
+
     Parameters
     ----------
 
@@ -256,8 +278,63 @@ def write_plasma_zoo_into_plot( ax, plasma_zoo,
 #;}}}
 
 
+def calc_plasma_grids( T_vals, n_vals ):
+#;{{{
+    """
+    Calculate Debye length and plasma parameter on a temperature-density grid.
+
+    Both quantities are calculated once, such that they can be shared by
+    the contour plots. Non-ideal plasmas (relativistic, degenerated, or
+    strongly coupled) are set to NaN in order to not plot them.
+
+    Parameters
+    ----------
+    T_vals: numpy array of floats
+        plasma temperature in eV, corresponding to y-axis
+    n_vals: numpy array of floats
+        plasma density in m^-3, corresponding to x-axis
+
+    Returns
+    -------
+    lambda_D: numpy array of float32
+        Debye length in meters, shape (len(T_vals), len(n_vals))
+    N_D: numpy array of float32
+        number of particles in Debye sphere, shape (len(T_vals), len(n_vals))
+    """
+
+    # spatial coordinates as column (T) and row (n), such that numpy 
+    # broadcasts them to the 2D grid without a meshgrid being stored
+    nn = np.reshape( n_vals, (1,-1) )
+    TT = np.reshape( T_vals, (-1,1) )
+
+    # caclulate the Debye length and (from it) the plasma parameter,
+    # N_D = 4/3*pi * n * lambda_D^3, evaluated in-place in one buffer;
+    # single precision is sufficient for the contour plots and halves the
+    # memory of the 2D grids (values in ideal plasmas are well within the
+    # range of float32, the masks below are evaluated in double precision)
+    nn_32    = nn.astype( np.float32 )
+    lambda_D = calc_debye( n=nn_32, T=TT.astype( np.float32 ) )
+    N_D      = lambda_D * lambda_D
+    N_D     *= lambda_D
+    N_D     *= 4./3. * np.pi * nn_32
+
+    # identify non-ideal plasma, combined into one mask: relativistic plasmas,
+    # degenerated plasmas, and non-ideal plasmas with strong coupling parameter
+    nonideal = (TT >= T_rel) | (TT <= calc_Tdeg( nn )) | (TT <= calc_Tnonideal( nn ))
+
+    # set lambda_D and N_D at non-ideal plasma to NaN in order to not plot it 
+    np.putmask( lambda_D, nonideal, np.nan )
+    np.putmask( N_D, nonideal, np.nan )
+
+    return lambda_D, N_D
+
+#;}}}
+
+
 def make_lambda_D_contours( fig, ax, 
                             T_vals=[], n_vals=[],
+                            lambda_D=None,
+                            nn=None, TT=None,
                             lang='en',
                             silent=True,
                           ):
@@ -275,6 +352,12 @@ def make_lambda_D_contours( fig, ax,
         plasma temperature in eV, corresponding to y-axis
     n_vals: numpy array of floats
         plasma density in m^-3, corresponding to x-axis
+    lambda_D: numpy array of floats
+        Debye length in meters as returned by calc_plasma_grids,
+        calculated if not provided
+    nn, TT: numpy arrays of floats
+        2D density and temperature coordinates of the grid (e.g. shared
+        with make_N_D_contours), created if not provided
     silent: bool
         if False, some useful (?) output will be printed to console
 
@@ -298,34 +381,13 @@ def make_lambda_D_contours( fig, ax,
     elif lang == 'de':
         cb_label    = 'Debyelänge in m'
 
-    # spatial coordinates (2D) for contour plot
-    nn, TT = np.meshgrid( n_vals, T_vals )
-
-    # caclulate the Debye length
-    lambda_D = np.empty( (T_vals.shape[0], n_vals.shape[0] ) )
-    for ii in np.arange(n_vals.shape[0]):
-        for jj in np.arange(T_vals.shape[0]):
-#            print( 'ii={0:d}, jj={1:d}, n={2:13.6e}, T={3:13.6e}, lambda_D={4:13.6e}'.
-#                    format( ii, jj, n_vals[ii], T_vals[jj], calc_debye(n=n_vals[ii],T=T_vals[jj]) )
-#                 )
-            lambda_D[jj,ii] = calc_debye( n=n_vals[ii], T=T_vals[jj] )
-
-    # identify non-ideal plasma
-    # relativistic plasmas
-    T_rel = calc_Trel()
-    # degenerated plasmas
-    TT_deg = calc_Tdeg( nn )
-    # non-ideal plasmas with strong coupling parameter
-    T_nonideal = calc_Tnonideal( nn )
-    # get indices of non-ideal plasmas in spatial coordinates 
-    TT_rel_ids      = (TT >= T_rel)
-    TT_deg_ids      = (TT <= TT_deg)
-    TT_nonideal_ids = (TT <= T_nonideal)
+    # spatial coordinates (2D) for contour plot, as read-only views
+    if (nn is None) or (TT is None):
+        nn, TT = np.broadcast_arrays( *np.meshgrid( n_vals, T_vals, sparse=True ) )
 
-    # set lambda_D at non-ideal plasma to NaN in order to not plot it 
-    lambda_D[TT_rel_ids]      = np.nan
-    lambda_D[TT_deg_ids]      = np.nan
-    lambda_D[TT_nonideal_ids] = np.nan
+    # caclulate the Debye length (NaN for non-ideal plasmas)
+    if lambda_D is None:
+        lambda_D, N_D = calc_plasma_grids( T_vals, n_vals )
 
     # contour levels are logarithmic due to large range
     lD_contLevels = np.logspace( np.log10(1e-12), 
@@ -352,6 +414,8 @@ def make_lambda_D_contours( fig, ax,
 
 def make_N_D_contours( fig, ax, 
                        T_vals=[], n_vals=[],
+                       N_D=None,
+                       nn=None, TT=None,
                        silent=True,
                      ):
 #;{{{
@@ -368,6 +432,12 @@ def make_N_D_contours( fig, ax,
         plasma temperature in eV, corresponding to y-axis
     n_vals: numpy array of floats
         plasma density in m^-3, corresponding to x-axis
+    N_D: numpy array of floats
+        plasma parameter as returned by calc_plasma_grids,
+        calculated if not provided
+    nn, TT: numpy arrays of floats
+        2D density and temperature coordinates of the grid (e.g. shared
+        with make_lambda_D_contours), created if not provided
     silent: bool
         if False, some useful (?) output will be printed to console
 
@@ -386,31 +456,13 @@ def make_N_D_contours( fig, ax,
         # plasma density in m^-3
         n_vals = np.logspace( np.log10(1e5),  np.log10(1e35), num=2000 )
 
-    # spatial coordinates (2D) for contour plot
-    nn, TT = np.meshgrid( n_vals, T_vals )
-
-    # calculate plasma parameter
-    N_D = np.empty( (T_vals.shape[0], n_vals.shape[0] ) )
-    for ii in np.arange(n_vals.shape[0]):
-        for jj in np.arange(T_vals.shape[0]):
-            N_D[jj,ii] = calc_ND( n=n_vals[ii], T=T_vals[jj] )
+    # spatial coordinates (2D) for contour plot, as read-only views
+    if (nn is None) or (TT is None):
+        nn, TT = np.broadcast_arrays( *np.meshgrid( n_vals, T_vals, sparse=True ) )
 
-    # identify non-ideal plasma
-    # relativistic plasmas
-    T_rel = calc_Trel()
-    # degenerated plasmas
-    TT_deg = calc_Tdeg( nn )
-    # non-ideal plasmas with strong coupling parameter
-    T_nonideal = calc_Tnonideal( nn )
-    # get indices of non-ideal plasmas in spatial coordinates 
-    TT_rel_ids      = (TT >= T_rel)
-    TT_deg_ids      = (TT <= TT_deg)
-    TT_nonideal_ids = (TT <= T_nonideal)
-
-    # set N_D at non-ideal plasma to NaN in order to not plot it 
-    N_D[TT_rel_ids]      = np.nan
-    N_D[TT_deg_ids]      = np.nan
-    N_D[TT_nonideal_ids] = np.nan
+    # calculate plasma parameter (NaN for non-ideal plasmas)
+    if N_D is None:
+        lambda_D, N_D = calc_plasma_grids( T_vals, n_vals )
 
     # contour levels are logarithmic due to large range covered
     ND_contLevels = np.logspace( np.log10(1e0), 
@@ -434,18 +486,21 @@ def make_N_D_contours( fig, ax,
                           colors='darkgrey', linestyles='dashed',
                         )
 
+    # formatted labels of the contour levels, built once
+    ND_contLabels = [ str_fmt(level) for level in ND_contLevels ]
+
     # NOTE: EVIL HACK to manually write contour label
     #       reason was that clabels was not working properly
     #       probably due to setting some areas to NaN
     for ii in np.arange(len(ND_contLabelsPos)):
         ax.text( ND_contLabelsPos[ii][0], ND_contLabelsPos[ii][1], 
-                 str_fmt(ND_contLevels[ii]),
+                 ND_contLabels[ii],
                  rotation=40, 
                  fontsize=10, color='darkgrey'
                )
         if not silent:
             print( '{0}: {1}, contour-level = {2}, formatted string-label = {3}'.format(
-                    fct_name, ii, ND_contLevels[ii], str_fmt(ND_contLevels[ii])) )
+                    fct_name, ii, ND_contLevels[ii], ND_contLabels[ii]) )
 
 #;}}}
 
@@ -501,23 +556,22 @@ def write_plasma_limits_into_plot( ax,
         txt_degPlasma = 'degenerated plasmas'
         txt_nidPlasma = 'non-ideal plasmas'
 
-    # spatial coordinates (2D) for contour plot
-    nn, TT = np.meshgrid( n_vals, T_vals )
- 
     # label boundary for relativistic plasmas
-    ax.hlines( y=calc_Trel(), xmin=np.nanmin(nn), xmax=np.nanmax(nn),
+    ax.hlines( y=calc_Trel(), xmin=np.nanmin(n_vals), xmax=np.nanmax(n_vals),
                linestyles='solid', linewidth=3, colors='grey' )
     ax.text( 1e20, 9e5, txt_relPlasma, color='grey' )
 
     # label boundary for degenerated plasmas
-    ax.plot( n_vals, calc_Tdeg(n_vals),
+    T_deg_vals = calc_Tdeg(n_vals)
+    ax.plot( n_vals, T_deg_vals,
              linestyle='solid', linewidth=3, color='grey' )
     label_deg_n = 5e30
     label_deg_T = 8e0
     # failed attemp to make rotation fit to T_deg-function
-    label_deg_n_id = np.where( np.abs(n_vals-label_deg_n) == np.abs(n_vals-label_deg_n).min() )
-    label_deg_n_id = label_deg_n_id[0][0]
-    T_deg_vals = calc_Tdeg(n_vals)
+    # index of n_vals closest to label_deg_n (n_vals is sorted)
+    label_deg_n_id = min( max( np.searchsorted( n_vals, label_deg_n ), 1 ), len(n_vals)-1 )
+    if (label_deg_n - n_vals[label_deg_n_id-1]) <= (n_vals[label_deg_n_id] - label_deg_n):
+        label_deg_n_id -= 1
     ## angle in data coordinates
     label_deg_angle_data = np.rad2deg( np.arctan2( T_deg_vals[label_deg_n_id] - T_deg_vals[(label_deg_n_id-1)],
                                                    n_vals[label_deg_n_id]     - n_vals[(label_deg_n_id-1)]) )
@@ -598,9 +652,16 @@ def main():
     fig1 = plt.figure( figsize=(8,6) )
     ax1  = fig1.add_subplot( 1,1,1 )
 
+    if plot__lambda_D or plot__N_D:
+        # calculated once, shared by both contour plots
+        lambda_D, N_D = calc_plasma_grids( T_vals, n_vals )
+        # spatial coordinates (2D) for contour plots, as read-only views
+        nn, TT = np.broadcast_arrays( *np.meshgrid( n_vals, T_vals, sparse=True ) )
+
     if plot__lambda_D:
         make_lambda_D_contours( fig1, ax1, 
                                 T_vals=T_vals, n_vals=n_vals,
+                                lambda_D=lambda_D, nn=nn, TT=TT,
                                 lang=language,
                                 silent=True,
                               )
@@ -608,12 +669,13 @@ def main():
     if plot__N_D:
         make_N_D_contours( fig1, ax1, 
                            T_vals=T_vals, n_vals=n_vals,
+                           N_D=N_D, nn=nn, TT=TT,
                            silent=True,
                          )
 
     if label_plasmas:
-        # get the plasma zoo
-        plasma_zoo = build_plasma_zoo(lang=language)
+        # get the plasma zoo (copy, as the returned dictionary is cached)
+        plasma_zoo = dict( build_plasma_zoo(lang=language) )
 
         # for xkcd-style, a small correction is necessary
         # otherwise, the following label would overlap with another
@@ -621,9 +683,9 @@ def main():
         # NOTE: ugly and dangerous, as different language have to be manually added
         if xkcd_style:
             if language == 'de':
-                plasma_zoo['Blitze'][0] = 5e21
+                plasma_zoo['Blitze'] = np.array( [5e21, plasma_zoo['Blitze'][1]] )
             else:
-                plasma_zoo['lightning'][0] = 5e21
+                plasma_zoo['lightning'] = np.array( [5e21, plasma_zoo['lightning'][1]] )
     
         write_plasma_zoo_into_plot( ax1, plasma_zoo, plot__lambda_D )
 
@@ -13,7 +13,13 @@ __copyright__   = 'University of Stuttgart'
 __license__     = 'MIT'
 
 # import standard modules
+import bisect
+import hashlib
+import math
+import os
 import numpy as np
+import scipy.optimize as optimize
+import matplotlib
 import matplotlib.pyplot as plt
 
 # credit string to include at top of plot, to ensure people know they can use the plot
@@ -31,6 +37,44 @@ plt.rcParams['ytick.direction'] = 'in'
 plt.rcParams['xtick.top']       = True
 plt.rcParams['ytick.right']     = True
 
+# annotations of experimental values
+# note: using some external graphics program (like inkscape, gimp)
+#       would certainly be faster than the following way...
+# devices appearing at different temperatures are distinguished by the
+# temperature range (in keV), the key is then (name, index of range)
+label_T_bins = { 'LHD':   [ 2. ], 
+                 'JET':   [ 5., 25. ],
+                 'JT60U': [ 18., 40. ],
+               }
+# offset of the label in points, default value is used for all devices not 
+# listed here, None means no label at all
+label_offset_default = ( 5.8, -3.6 )
+label_offsets = { 'Alcator C-mod':  ( -91.7, -4.3 ),
+                  'Tore Supra':     ( -70.6, -4.3 ),
+                  'W7-A':           ( -5.8, -14.4 ),
+                  'W7-AS':          ( -43.2, -3.6 ),
+                  'Alcator':        ( 2.9, 1.4 ),
+                  'TFTR (DT)':      ( -4.3, 3.6 ),
+                  ('LHD', 0):       ( -30.2, -4.3 ),
+                  ('LHD', 1):       ( 5.8, -4.3 ),
+                  ('JET', 0):       ( -10.1, 4.3 ),
+                  ('JET', 1):       None,
+                  ('JET', 2):       ( -7.2, -12.2 ),
+                  ('JT60U', 1):     None,
+                  ('JT60U', 2):     ( 5.8, -3.6 ),
+                  '?':              None,
+                }
+# labels placed at a fixed position (in data coordinates), optionally with an
+# arrow pointing to the experimental value (to have all arrows for the same 
+# device starting at the same point): (xytext, ha, va, arrow)
+label_arrows = { ('JT60U', 0):      ( (11, 1.2e21),  'right',  'bottom', True ),
+                 'ASDEX Upgrade':   ( (17, 5e19),    'left',   'center', True ),
+                 'ASDEX':           ( (7.5, .9e19),  'left',   'center', True ),
+                 'DIII-D':          ( (8, 5e20),     'center', 'bottom', True ),
+                 'JET (DT)':        ( (23, 1.4e21),  'center', 'bottom', True ),
+                 'EAST':            ( (1.5, 0.7e19), 'center', 'bottom', False ),
+               }
+
 
 def get_DT_fusion_reactivity( T_ion, silent=True ):
 #;{{{
@@ -44,14 +88,14 @@ def get_DT_fusion_reactivity( T_ion, silent=True ):
 
     Parameters
     ----------
-    T_ion: float
+    T_ion: float or numpy-array
         ion temperature in keV, valid range 0.2-100 keV
     silent: bool
         if True, some (useful ?) output will be printed to console
 
     Returns
     -------
-    float
+    float or numpy-array
         fusion reactivity in m^3/s
     '''
 
@@ -75,21 +119,227 @@ def get_DT_fusion_reactivity( T_ion, silent=True ):
         c6      = -1.06750e-4
         c7      = 1.36600e-5
 
-    theta = T_ion / ( 1. - T_ion*(c2+T_ion*(c4+T_ion*c6)) / (1.+T_ion*(c3+T_ion*(c5+T_ion*c7))) )
-    chi   = ( b_G**2/(4.*theta) )**(1./3.)
+    if isinstance( T_ion, (float, int) ) and T_ion > 0:
+        # scalar T_ion (e.g. when called from within a root-finder):
+        # plain float arithmetic avoids the overhead of numpy's ufuncs
+        theta_num   = T_ion*( c2 + T_ion*(c4 + T_ion*c6) )
+        theta_den   = 1. + T_ion*( c3 + T_ion*(c5 + T_ion*c7) )
+        theta       = T_ion / ( 1. - theta_num/theta_den )
+        chi         = ( b_G**2/(4.*theta) )**(1./3.)
+        sigma_v     = (c1*1e-6) * theta * math.sqrt( chi/(mr_c2*T_ion*T_ion*T_ion) ) * math.exp(-3.*chi)
+    else:
+        T_ion = np.asarray( T_ion, dtype=float )
+
+        # numerator and denominator of the Pade approximation, in Horner form
+        theta_num   = T_ion*( c2 + T_ion*(c4 + T_ion*c6) )
+        theta_den   = 1. + T_ion*( c3 + T_ion*(c5 + T_ion*c7) )
+        theta       = T_ion / ( 1. - theta_num/theta_den )
+        chi   = np.cbrt( b_G**2/(4.*theta) )
 
-    # reactivity as given in the paper in units of cm^3/s (with T_ion in keV)
-    sigma_v = c1 * theta * np.sqrt( chi/(mr_c2*T_ion**3) ) * np.exp(-3.*chi)
-    # scale to m^3/s
-    sigma_v *= 1e-6
+        # reactivity as given in the paper in units of cm^3/s (with T_ion in keV),
+        # scaled to m^3/s
+        sigma_v = (c1*1e-6) * theta * np.sqrt( chi/mr_c2 * T_ion**-3 ) * np.exp(-3.*chi)
 
     if not silent:
-        print( '    T_i = {0:5.1f} keV => (D+T) reactivity = {1:8.3e} m^3/s',format(T_ion, sigma_v) )
+        if np.ndim(T_ion) == 0:
+            print( '    T_i = {0:5.1f} keV => (D+T) reactivity = {1:8.3e} m^3/s'.format(float(T_ion), float(sigma_v)) )
+        else:
+            print( '    evaluated (D+T) reactivity for {0} values of T_i'.format(np.size(T_ion)) )
 
     return sigma_v
 #;}}}
 
 
+# constants required for the ignition and bremsstrahlung limits
+c_br    = 1.04e-19/math.sqrt(1e3)   # m^3 keV^1/2 s^-1 (1.04e-19 m^3 eV^1/2 s^-1)
+E_alpha = 3.52e3                    # keV
+
+
+def calc_heating_margin( T_ion, Z_eff=1 ):
+#;{{{
+    '''
+    Return the difference between alpha-heating and bremsstrahlung losses.
+
+    Both terms are normalized to n^2/4 (i.e. to n_D*n_T for a 50:50 D-T 
+    mixture), ignition is only possible where the difference is positive.
+
+    Parameters
+    ----------
+    T_ion: float or numpy-array
+        ion temperature in keV
+    Z_eff: float
+        effective charge number
+
+    Returns
+    -------
+    float or numpy-array
+        difference in keV m^3/s
+    '''
+
+    return get_DT_fusion_reactivity(T_ion)*E_alpha - 4.*c_br*Z_eff*np.sqrt(T_ion)
+#;}}}
+
+
+def calc_ignition_limit( T_ion, Z_eff=1 ):
+#;{{{
+    '''
+    Return the triple product required for ignition.
+
+    Ignition means that alpha-heating sustains the fusion reaction with no
+    external heating, this is only possible where calc_heating_margin is 
+    positive.
+
+    Parameters
+    ----------
+    T_ion: float or numpy-array
+        ion temperature in keV
+    Z_eff: float
+        effective charge number
+
+    Returns
+    -------
+    float or numpy-array
+        triple product n*T*tau_E in m^-3 keV s
+    '''
+
+    return 12.*T_ion*T_ion / calc_heating_margin( T_ion, Z_eff=Z_eff )
+#;}}}
+
+
+def calc_bremsstrahlung_limit( T_ion, Z_eff=1 ):
+#;{{{
+    '''
+    Return the maximum triple product allowed by bremsstrahlung losses.
+
+    Requirement: bremsstrahlung losses < total energy loss rate per unit 
+    volume, i.e. P_rad <= W/tau_E, re-arranging yields 
+    n*T*tau_E <= 3*T^1.5/c_br.
+
+    Parameters
+    ----------
+    T_ion: float or numpy-array
+        ion temperature in keV
+    Z_eff: float
+        effective charge number
+
+    Returns
+    -------
+    float or numpy-array
+        triple product n*T*tau_E in m^-3 keV s
+    '''
+
+    return 3.*T_ion**(1.5) / (Z_eff*c_br)
+#;}}}
+
+
+# experimental values of the triple product achieved in different devices,
+# see get_experimental_dataset for the corresponding references
+experimental_datasets = {}
+
+experimental_datasets['Bosch'] = dict(
+    names        = ( 'T3', 'T3', 'Pulsator', 'T10', 
+                     'ASDEX', 'ASDEX', 'Tore Supra', 'ASDEX Upgrade', 
+                     'JT60', 'Alcator C-mod', 'TFTR', 'Alcator', 
+                     'JET', 'DIII-D', 'ASDEX Upgrade', 'DIII-D', 
+                     'TFTR', 'TFTR (DT)', 'JT60U', 'JT60U', 
+                     'JET (DT)', 'JET', 'JET (DT)', '?', 
+                     'JT60U', 'LHD', 'LHD', 'W7-AS', 
+                     'W7-A'
+                   ),
+    device_types = np.array( [2, 2, 2, 2, 
+                              2, 2, 2, 2, 
+                              2, 2, 2, 2, 
+                              2, 2, 2, 2, 
+                              2, 2, 2, 2, 
+                              2, 2, 2, 0, 
+                              2, 1, 1, 1, 
+                              1
+                             ] ),
+    T_vals       = np.array( [ 0.16974119, 0.30918382, 0.22998638, 0.73804885,
+                               4.96777849, 2.2553371 , 2.57170267, 3.35038255,
+                               6.73158083, 1.50030032, 1.49146486, 3.07362999,
+                               4.42561292, 6.33446757, 11.0294331, 12.6267789,
+                               34.1913846, 40.4518789, 16.190024,  15.939778,
+                               20.5655601, 28.3716432, 33.7292375, 40.408576,
+                               44.9754023, 1.50931078, 9.16780799, 0.83739708,
+                               0.61829778
+                             ] ),
+    nTtau_vals   = np.array( [1.75839569e+16, 2.10183008e+17, 8.34943817e+17, 3.05070787e+18,
+                              5.39415148e+18, 1.60864212e+19, 2.79836303e+19, 4.47870397e+19,
+                              3.08640860e+19, 7.40596733e+19, 1.80870567e+20, 8.34919183e+19,
+                              1.62570081e+20, 1.69728539e+20, 8.37008333e+19, 2.06716580e+20, 
+                              2.71606706e+20, 5.15793728e+20, 6.63979351e+20, 8.80494689e+20,
+                              7.44951684e+20, 8.82853215e+20, 1.16051029e+21, 1.24463067e+21,
+                              1.54281713e+21, 1.55385139e+19, 2.11990093e+19, 1.66398614e+18,
+                              5.83188960e+17
+                             ] )
+)
+
+experimental_datasets['my_dset'] = dict(
+    names        = ( 'START', 'Globus-M', 'NSTX', 'MAST', 
+                     'W7-X (lim)', 'W7-X (div)', 'ITER', 'TCV', 
+                     'EAST'
+                   ),
+    device_types = np.array( [ 3, 3, 3, 3, 
+                               1, 1, 2, 2, 
+                               2, 
+                             ] ),
+    T_vals       = np.array( [ 0.25, 0.5, 1., 0.9, 
+                               1.,   3.5, 20., 3.7, 
+                               2.1,
+                             ] ),
+    nTtau_vals   = np.array( [ 2.50000000e+16, 4.50000000e+16, 6.00000000e+17, 8.10000000e+17,
+                               2.00000000e+18, 6.60000000e+19, 3.00000000e+21, 3e18, 
+                               1e19
+                             ] )
+)
+
+experimental_datasets['EUROfusion'] = dict(
+    names        = ( 'T3', 'TFR', 'T10', 'PLT', 
+                     'ASDEX', 'ALC-A', 'TFR', 'ASDEX',
+                     'TEXTOR', 'PLT', 'Tore Supra', 'FT', 
+                     'ALC-C', 'TFTR', 'JT-60', 'DIII-D', 
+                     'JET', 'ASDEX-U', 'DIII-D', 'TFTR', 
+                     'JT-60U', 'JET', 'DIII-D', 'TFTR', 
+                     'JET', 'JET', 'JET', 'JET', 
+                     'TFTR', 'JT-60U', 'ITER'
+                   ),
+    device_types = np.array( [ 2, 2, 2, 2, 
+                               2, 2, 2, 2, 
+                               2, 2, 2, 2, 
+                               2, 2, 2, 2, 
+                               2, 2, 2, 2, 
+                               2, 2, 2, 2, 
+                               2, 2, 2, 2, 
+                               2, 2, 2
+                             ] ),
+    T_vals       = np.array( [ 0.29457498, 0.87620758, 0.77754643, 0.95833535,
+                               0.67219729, 0.72430616, 1.6902491 , 2.3214469,
+                               4.68336189, 6.95684699, 2.76667723, 0.99478727,
+                               1.29670285, 1.52249236, 2.72567086, 5.04641705,
+                               5.1414959 , 9.91820781, 15.6396948, 19.3482071,
+                               9.88125103, 17.956236 , 21.1617331, 29.611856,
+                               11.3872861, 18.294547 , 31.084376 , 35.0286038,
+                               47.3964468, 47.7516439, 19.2761126
+                             ] ),
+    nTtau_vals   = np.array( [1.90726752e+17, 1.05386684e+18, 2.35462683e+18, 3.91227391e+18,
+                              7.38011641e+18, 1.33450920e+19, 1.41714706e+18, 1.48969763e+19,
+                              1.36882186e+19, 3.44589835e+18, 3.62231044e+19, 3.97568513e+19,
+                              9.18858856e+19, 1.76292161e+20, 1.00849818e+20, 1.56596240e+20,
+                              2.08802354e+20, 1.12577519e+20, 7.37387379e+19, 1.60622614e+20,
+                              3.41108325e+20, 3.41108325e+20, 4.62590403e+20, 3.49878839e+20,
+                              8.43587429e+20, 9.33751973e+20, 7.36763646e+20, 9.74108044e+20,
+                              9.02674252e+20, 1.57793438e+21, 3.86947102e+21
+                             ] )
+)
+
+# the arrays are shared between all calls of get_experimental_dataset,
+# protect them against (accidental) modifications (names are tuples)
+for dset in experimental_datasets.values():
+    for key in ('T_vals', 'nTtau_vals', 'device_types'):
+        dset[key].setflags( write=False )
+
+
 def get_experimental_dataset( dataset='Bosch', silent=True ):
 #;{{{
     '''
@@ -135,11 +385,11 @@ def get_experimental_dataset( dataset='Bosch', silent=True ):
 
     Returns
     -------
-    tuple (of numpy-arrays)
+    tuple (of read-only numpy-arrays, except for names)
         T_vals: ion temperature in keV, 
         nTtau_vals: triple product in m^-3 keV s, 
         device_types: type of device (1:stellarator, 2:tokamak, 3:spherical tokamak), 
-        names: name of device
+        names: name of device (tuple of str)
     '''
 
     if not silent:
@@ -147,104 +397,72 @@ def get_experimental_dataset( dataset='Bosch', silent=True ):
         print( '    dataset chosen: {0}'.format(dataset) )
         print( '    check the doc-string for the corresponding references' )
 
-    if dataset == 'Bosch':
-        names = np.array( [ 'T3', 'T3', 'Pulsator', 'T10', 
-                            'ASDEX', 'ASDEX', 'Tore Supra', 'ASDEX Upgrade', 
-                            'JT60', 'Alcator C-mod', 'TFTR', 'Alcator', 
-                            'JET', 'DIII-D', 'ASDEX Upgrade', 'DIII-D', 
-                            'TFTR', 'TFTR (DT)', 'JT60U', 'JT60U', 
-                            'JET (DT)', 'JET', 'JET (DT)', '?', 
-                            'JT60U', 'LHD', 'LHD', 'W7-AS', 
-                            'W7-A'
-                          ] )
-        device_types = np.array( [2, 2, 2, 2, 
-                                  2, 2, 2, 2, 
-                                  2, 2, 2, 2, 
-                                  2, 2, 2, 2, 
-                                  2, 2, 2, 2, 
-                                  2, 2, 2, 0, 
-                                  2, 1, 1, 1, 
-                                  1
-                                 ] )
-        T_vals = np.array( [ 0.16974119, 0.30918382, 0.22998638, 0.73804885,
-                             4.96777849, 2.2553371 , 2.57170267, 3.35038255,
-                             6.73158083, 1.50030032, 1.49146486, 3.07362999,
-                             4.42561292, 6.33446757, 11.0294331, 12.6267789,
-                             34.1913846, 40.4518789, 16.190024,  15.939778,
-                             20.5655601, 28.3716432, 33.7292375, 40.408576,
-                             44.9754023, 1.50931078, 9.16780799, 0.83739708,
-                             0.61829778
-                           ] )
-        nTtau_vals = np.array( [1.75839569e+16, 2.10183008e+17, 8.34943817e+17, 3.05070787e+18,
-                                5.39415148e+18, 1.60864212e+19, 2.79836303e+19, 4.47870397e+19,
-                                3.08640860e+19, 7.40596733e+19, 1.80870567e+20, 8.34919183e+19,
-                                1.62570081e+20, 1.69728539e+20, 8.37008333e+19, 2.06716580e+20, 
-                                2.71606706e+20, 5.15793728e+20, 6.63979351e+20, 8.80494689e+20,
-                                7.44951684e+20, 8.82853215e+20, 1.16051029e+21, 1.24463067e+21,
-                                1.54281713e+21, 1.55385139e+19, 2.11990093e+19, 1.66398614e+18,
-                                5.83188960e+17
-                               ] )
-    elif dataset == 'my_dset':
-        names = np.array( ['START', 'Globus-M', 'NSTX', 'MAST', 
-                           'W7-X (lim)', 'W7-X (div)', 'ITER', 'TCV', 
-                           'EAST'
-                          ] )
-        device_types = np.array( [ 3, 3, 3, 3, 
-                                   1, 1, 2, 2, 
-                                   2, 
-                                 ] )
-        T_vals = np.array( [ 0.25, 0.5, 1., 0.9, 
-                             1.,   3.5, 20., 3.7, 
-                             2.1,
-                           ] )
-        nTtau_vals = np.array( [ 2.50000000e+16, 4.50000000e+16, 6.00000000e+17, 8.10000000e+17,
-                                 2.00000000e+18, 6.60000000e+19, 3.00000000e+21, 3e18, 
-                                 1e19
-                               ] )
-    elif dataset == 'EUROfusion':
-        names = np.array( [ 'T3', 'TFR', 'T10', 'PLT', 
-                            'ASDEX', 'ALC-A', 'TFR', 'ASDEX',
-                            'TEXTOR', 'PLT', 'Tore Supra', 'FT', 
-                            'ALC-C', 'TFTR', 'JT-60', 'DIII-D', 
-                            'JET', 'ASDEX-U', 'DIII-D', 'TFTR', 
-                            'JT-60U', 'JET', 'DIII-D', 'TFTR', 
-                            'JET', 'JET', 'JET', 'JET', 
-                            'TFTR', 'JT-60U', 'ITER'
-                          ] )
-        device_types = np.array( [ 2, 2, 2, 2, 
-                                   2, 2, 2, 2, 
-                                   2, 2, 2, 2, 
-                                   2, 2, 2, 2, 
-                                   2, 2, 2, 2, 
-                                   2, 2, 2, 2, 
-                                   2, 2, 2, 2, 
-                                   2, 2, 2
-                                 ] )
-        T_vals = np.array( [ 0.29457498, 0.87620758, 0.77754643, 0.95833535,
-                             0.67219729, 0.72430616, 1.6902491 , 2.3214469,
-                             4.68336189, 6.95684699, 2.76667723, 0.99478727,
-                             1.29670285, 1.52249236, 2.72567086, 5.04641705,
-                             5.1414959 , 9.91820781, 15.6396948, 19.3482071,
-                             9.88125103, 17.956236 , 21.1617331, 29.611856,
-                             11.3872861, 18.294547 , 31.084376 , 35.0286038,
-                             47.3964468, 47.7516439, 19.2761126
-                           ] )
-        nTtau_vals = np.array( [1.90726752e+17, 1.05386684e+18, 2.35462683e+18, 3.91227391e+18,
-                                7.38011641e+18, 1.33450920e+19, 1.41714706e+18, 1.48969763e+19,
-                                1.36882186e+19, 3.44589835e+18, 3.62231044e+19, 3.97568513e+19,
-                                9.18858856e+19, 1.76292161e+20, 1.00849818e+20, 1.56596240e+20,
-                                2.08802354e+20, 1.12577519e+20, 7.37387379e+19, 1.60622614e+20,
-                                3.41108325e+20, 3.41108325e+20, 4.62590403e+20, 3.49878839e+20,
-                                8.43587429e+20, 9.33751973e+20, 7.36763646e+20, 9.74108044e+20,
-                                9.02674252e+20, 1.57793438e+21, 3.86947102e+21
-                               ] )
-
-    return T_vals, nTtau_vals, device_types, names
+    if dataset not in experimental_datasets:
+        print( 'ERROR: dataset {0} not known'.format(dataset) )
+        return np.nan
+
+    dset = experimental_datasets[dataset]
+
+    return dset['T_vals'], dset['nTtau_vals'], dset['device_types'], dset['names']
 
 #;}}}
 
 
-def make_plot( fname_plot='' ):
+def get_plot_hash():
+#;{{{
+    '''
+    Return a hash identifying the plot produced by this script.
+
+    The hash is calculated from the source code of this script, which 
+    contains all data and settings used for the plot, and from the versions
+    of numpy and matplotlib.
+
+    Returns
+    -------
+    str
+        SHA-1 hash as hexadecimal string
+    '''
+
+    hash_obj = hashlib.sha1()
+    with open( __file__, 'rb' ) as f:
+        hash_obj.update( f.read() )
+    hash_obj.update( '{0}|{1}'.format(np.__version__, matplotlib.__version__).encode() )
+
+    return hash_obj.hexdigest()
+#;}}}
+
+
+def plot_is_up_to_date( fname_plot, plot_hash ):
+#;{{{
+    '''
+    Check if a plot file exists which was produced with the given hash.
+
+    The hash is stored by make_plot in a file next to the plot, with 
+    '.sha1' appended to its name.
+
+    Parameters
+    ----------
+    fname_plot: str
+        filename of the plot
+    plot_hash: str
+        hash as returned by get_plot_hash
+
+    Returns
+    -------
+    bool
+        True if the plot file and the stored hash exist and the hash matches
+    '''
+
+    fname_hash = fname_plot + '.sha1'
+    if not (os.path.isfile(fname_plot) and os.path.isfile(fname_hash)):
+        return False
+
+    with open( fname_hash, 'r' ) as f:
+        return f.read().strip() == plot_hash
+#;}}}
+
+
+def make_plot( fname_plot='', plot_hash='', fig=None, dpi=200 ):
 #;{{{
     '''
     Output a plot, either to X-window (default) or into file. 
@@ -253,6 +471,13 @@ def make_plot( fname_plot='' ):
     ----------
     fname_plot: str
         possible values are 'Bosch', 'my_dset', 'EUROfusion'
+    plot_hash: str
+        if not empty, it is stored next to the plot file (see 
+        plot_is_up_to_date)
+    fig: matplotlib figure
+        figure to be written into file, the current figure is used if None
+    dpi: int
+        resolution of the plot file in dots per inch
 
     Returns
     -------
@@ -260,8 +485,13 @@ def make_plot( fname_plot='' ):
 
 
     if len(fname_plot) > 0:
-        plt.savefig( fname_plot, dpi=600, bbox_inches='tight' )
+        if fig is None:
+            fig = plt.gcf()
+        fig.savefig( fname_plot, dpi=dpi, bbox_inches='tight' )
         print( 'written plot into file {0}'.format(fname_plot) )
+        if len(plot_hash) > 0:
+            with open( fname_plot + '.sha1', 'w' ) as f:
+                f.write( plot_hash + '\n' )
     else:
         plt.show()
 
@@ -279,33 +509,38 @@ def main():
 
     # set fname_plot to an empty string to plot into X-window
     fname_plot = 'triple_product_vs_T.png'
+    # resolution of the plot file
+    dpi_plot   = 200
+
+    # nothing to do if the plot file was already produced by this version
+    # of the script (with the same data and settings)
+    if len(fname_plot) > 0:
+        plot_hash = get_plot_hash()
+        if plot_is_up_to_date( fname_plot, plot_hash ):
+            print( 'plot file {0} is up to date, nothing to do'.format(fname_plot) )
+            return
+    else:
+        plot_hash = ''
 
     # set ratio of screen on which plot should be displayed
     scr_ratio   = '16:9'    # possible values: '4:3', '16:9'
 
-    # load Bosch dataset
-    T_vals__B, nTtau_vals__B, device_types__B, names__B = get_experimental_dataset( dataset='Bosch' )
-    # load my own dataset
-    T_vals__my, nTtau_vals__my, device_types__my, names__my = get_experimental_dataset( dataset='my_dset' )
-    # combine datasets
-    T_vals          = np.append( T_vals__B,         T_vals__my )
-    nTtau_vals      = np.append( nTtau_vals__B,     nTtau_vals__my )
-    device_types    = np.append( device_types__B,   device_types__my )
-    names           = np.append( names__B,          names__my )
-
-    # constants required for small lambda functions below
-    c_br    = 1.04e-19          # m^3 eV^1/2 s^-1
-    E_alpha = 3.52e6            # MeV
-
-    # ignition: alpha-heating used to sustain fusion reaction with no external heating
-    F_ignition  = lambda T_ion, Z_eff: 12.*T_ion**2 / ( get_DT_fusion_reactivity(T_ion*1e-3)*E_alpha
-                                                       - 4.*c_br*Z_eff*np.sqrt(T_ion) )
-
-    # bremsstrahlung limit
-    # requirement: bremsstrahlung losses < total energy loss rate per unit volume
-    #   => P_rad <= W/tau_E
-    # re-arranging yields n*T*tau_E <= 3*T^1.5/c_br
-    F_bremslimit = lambda T_ion, Z_eff: 3.*T_ion**(1.5) / (Z_eff*c_br)
+    # load Bosch dataset and my own dataset and combine them
+    dset__B     = get_experimental_dataset( dataset='Bosch' )
+    dset__my    = get_experimental_dataset( dataset='my_dset' )
+    T_vals, nTtau_vals, device_types = [ np.concatenate( (vals__B, vals__my) ) 
+                                         for vals__B, vals__my in zip( dset__B[:3], dset__my[:3] ) ]
+    names   = dset__B[3] + dset__my[3]
+
+    # bremsstrahlung limit (for Z_eff=1)
+    T_full      = np.logspace( np.log10(.1), np.log10(100), 100 )
+    F_brems_Z1  = calc_bremsstrahlung_limit( T_full )
+
+    # ignition (for Z_eff=1), starting slightly above the lowest temperature 
+    # where alpha-heating can exceed bremsstrahlung losses
+    T_ign_min   = optimize.brentq( calc_heating_margin, 1., 100. )
+    T_ignition  = np.logspace( np.log10(1.001*T_ign_min), np.log10(100), 100 )
+    F_ign_Z1    = calc_ignition_limit( T_ignition )
 
     # set-up plot
     if scr_ratio == '4:3':
@@ -315,8 +550,7 @@ def main():
     ax1  = fig1.add_subplot( 1,1,1 )
 
     # filled area indicating bremsstrahlung limit
-    T_full = np.logspace( np.log10(.1e3), np.log10(100e3), 100 )
-    ax1.fill_between( x=T_full*1e-3, y1=F_bremslimit(T_full,1)*1e-3, y2=1e22, 
+    ax1.fill_between( x=T_full, y1=F_brems_Z1, y2=1e22, 
                       color='grey',
                     )
     if scr_ratio == '4:3':
@@ -326,11 +560,7 @@ def main():
     ax1.annotate( 'bremsstrahlung limit', xy=( 0.15, 1.1e20), color='.85', rotation=bremsLimit_txt_angle )
 
     # filled area indicating ignition
-    T_ignition  = np.logspace( np.log10(1e3), np.log10(100e3), 100 )
-    F_ign_Z1    = F_ignition( T_ignition, 1 )
-    ax1.fill_between( T_ignition[ F_ign_Z1>0 ]*1e-3, 
-                      F_ign_Z1[ F_ign_Z1>0 ]*1e-3 , 
-                      1e22 )
+    ax1.fill_between( T_ignition, F_ign_Z1, 1e22 )
     if scr_ratio == '4:3':
         ignitionLimit_txt_x0 = 8.1
     elif scr_ratio == '16:9':
@@ -338,183 +568,48 @@ def main():
     ax1.annotate( 'ignition (DT)', xy=( ignitionLimit_txt_x0, 5.3e21), color='.85' )
 
     # plot experimental values
+    # indices of stellarators, tokamaks, spherical tokamaks
+    idx_stell, idx_tok, idx_sph = [ np.flatnonzero( device_types == dev ) for dev in (1, 2, 3) ]
     # stellarators
-    ax1.plot( T_vals[ device_types == 1 ], nTtau_vals[ device_types == 1 ],
-              marker='o', color='red', linestyle='None',
-              label='Stellarator'
-            )
+    ax1.scatter( T_vals[ idx_stell ], nTtau_vals[ idx_stell ],
+                 marker='o', color='red', linewidths=1., joinstyle='miter',
+                 label='Stellarator'
+               )
     # tokamaks
-    ax1.plot( T_vals[ device_types == 2 ], nTtau_vals[ device_types == 2 ],
-              marker='s', color='blue', linestyle='None',
-              label='Tokamak'
-            )
+    ax1.scatter( T_vals[ idx_tok ], nTtau_vals[ idx_tok ],
+                 marker='s', color='blue', linewidths=1., joinstyle='miter',
+                 label='Tokamak'
+               )
     # spherical tokamaks
-    ax1.plot( T_vals[ device_types == 3 ], nTtau_vals[ device_types == 3 ],
-              marker='D', color='green', linestyle='None',
-              label='Spherical tokamak'
-            )
+    ax1.scatter( T_vals[ idx_sph ], nTtau_vals[ idx_sph ],
+                 marker='D', color='green', linewidths=1., joinstyle='miter',
+                 label='Spherical tokamak'
+               )
 
     # write annotations to experimental values
-    # note: using some external graphics program (like inkscape, gimp)
-    #       would certainly be faster than the following way...
-    # list with cases which cannot be annotated automatically
-    # because labels would otherwise overlap with something
-    extra_labels = [ 'TFTR (DT)', 'JT60U', 'Alcator C-mod', 'Alcator', 'JET (DT)', 
-                     '?', 'Tore Supra', 'LHD', 'JET', 'ASDEX Upgrade', 'DIII-D',
-                     'ASDEX', 'W7-A', 'W7-AS', 'EAST' ]
-    if len(fname_plot) > 0:
-        dpi_scale   = 6
-    else:
-        dpi_scale   = 1
-    for ii in range( len(names) ):
-        # automatic annotation
-        if names[ii] not in extra_labels:
-            plt.annotate( names[ii], 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(8*dpi_scale,-5*dpi_scale), 
-                          textcoords='offset pixels',
-                        )
-        # handles the above defined extra cases
-        elif (names[ii] == 'Alcator C-mod') or (names[ii] == 'Tore Supra'):
-            plt.annotate( names[ii], 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(-9.8*dpi_scale*len(names[ii]),-6*dpi_scale), 
-                          textcoords='offset pixels',
-                        )
-        elif names[ii] == 'W7-A':
-            plt.annotate( names[ii], 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(-8*dpi_scale,-20*dpi_scale), 
-                          textcoords='offset pixels',
-                        )
-        elif names[ii] == 'W7-AS':
-            plt.annotate( names[ii], 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(-12*dpi_scale*len(names[ii]),-5*dpi_scale), 
-                          textcoords='offset pixels',
-                        )
-        elif names[ii] == 'Alcator':
-            plt.annotate( names[ii], 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(4.*dpi_scale,+2*dpi_scale), 
-                          textcoords='offset pixels',
-                        )
-        elif names[ii] == 'TFTR (DT)':
-            plt.annotate( names[ii], 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(-6*dpi_scale,5*dpi_scale), 
-                          textcoords='offset pixels',
-                        )
-        elif names[ii] == 'LHD':
-            if T_vals[ii] < 2:
-                plt.annotate( names[ii], 
-                              xy=( T_vals[ii], nTtau_vals[ii]), 
-                              xytext=(-14*dpi_scale*len(names[ii]),-6*dpi_scale), 
-                              textcoords='offset pixels',
-                            )
-            else:
-                plt.annotate( names[ii], 
-                              xy=( T_vals[ii], nTtau_vals[ii]), 
-                              xytext=(8*dpi_scale,-6*dpi_scale), 
-                              textcoords='offset pixels',
-                            )
-        elif names[ii] == 'JET':
-            if T_vals[ii] < 5:
-                plt.annotate( names[ii], 
-                              xy=( T_vals[ii], nTtau_vals[ii]), 
-                              xytext=(-14*dpi_scale,6*dpi_scale), 
-                              textcoords='offset pixels',
-                            )
-            elif T_vals[ii] > 25:
-                plt.annotate( names[ii], 
-                              xy=( T_vals[ii], nTtau_vals[ii]), 
-                              xytext=(-10*dpi_scale,-17*dpi_scale), 
-                              textcoords='offset pixels',
-                            )
-        elif names[ii] == 'JT60U':
-            if T_vals[ii] > 40:
-                plt.annotate( names[ii], 
-                              xy=( T_vals[ii], nTtau_vals[ii]), 
-                              xytext=(8*dpi_scale,-5*dpi_scale), 
-                              textcoords='offset pixels',
-                            )
-            elif T_vals[ii] < 18:
-                # only arrow (to have all arrows starting at same point)
-                plt.annotate( '', 
-                              xy=( T_vals[ii], nTtau_vals[ii]), 
-                              xytext=(11, 1.2e21),
-                              arrowprops=dict( arrowstyle="->", shrinkA=0, color='0.2' )
-                            )
-                # make annotation text (is done once for every case...)
-                plt.annotate( names[ii],
-                              xy=( T_vals[ii], nTtau_vals[ii]), 
-                              xytext=(11, 1.2e21),
-                              ha='right', va='bottom'
-                            )
-        elif names[ii] == 'ASDEX Upgrade':
-            # only arrow (to have all arrows starting at same point)
-            plt.annotate( '', 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(17, 5e19),
-                          arrowprops=dict( arrowstyle="->", shrinkA=0, color='0.2' )
-                        )
-            # make annotation text (is done once for every case...)
-            plt.annotate( names[ii],
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(17, 5e19),
-                          ha='left', va='center'
-                        )
-        elif names[ii] == 'ASDEX':
-            # only arrow (to have all arrows starting at same point)
-            plt.annotate( '', 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(7.5, .9e19),
-                          arrowprops=dict( arrowstyle="->", shrinkA=0, color='0.2' )
-                        )
-            # make annotation text (is done once for every case...)
-            plt.annotate( names[ii],
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(7.5, .9e19),
-                          ha='left', va='center'
-                        )
-        elif names[ii] == 'DIII-D':
-            # only arrow (to have all arrows starting at same point)
-            plt.annotate( '', 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(8, 5e20),
-                          arrowprops=dict( arrowstyle="->", shrinkA=0, color='0.2' )
-                        )
-            # make annotation text (is done once for every case...)
-            plt.annotate( names[ii],
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(8, 5e20),
-                          ha='center', va='bottom'
-                        )
-        elif names[ii] == 'JET (DT)':
-            # only arrow (to have all arrows starting at same point)
-            plt.annotate( '', 
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(23, 1.4e21),
+    annotate    = ax1.annotate
+    # labels at fixed positions are shared by all arrows of a device
+    arrow_labels_done = set()
+    for name, T_val, nTtau_val in zip( names, T_vals.tolist(), nTtau_vals.tolist() ):
+        xy      = ( T_val, nTtau_val )
+        if name in label_T_bins:
+            key = ( name, bisect.bisect( label_T_bins[name], T_val ) )
+        else:
+            key = name
+
+        if key in label_arrows:
+            xytext, ha, va, arrow = label_arrows[key]
+            if arrow:
+                annotate( '', xy=xy, xytext=xytext,
                           arrowprops=dict( arrowstyle="->", shrinkA=0, color='0.2' )
                         )
-            # make annotation text (is done once for every case...)
-            plt.annotate( names[ii],
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(23, 1.4e21),
-                          ha='center', va='bottom'
-                        )
-        elif names[ii] == 'EAST':
-            # plt.annotate( '', 
-            #               xy=( T_vals[ii], nTtau_vals[ii]), 
-            #               xytext=(2, 0.7e20),
-            #               arrowprops=dict( arrowstyle="->", shrinkA=0, color='0.2' )
-            #             )
-            # make annotation text (is done once for every case...)
-            plt.annotate( names[ii],
-                          xy=( T_vals[ii], nTtau_vals[ii]), 
-                          xytext=(1.5, 0.7e19),
-                          ha='center', va='bottom'
-                        )            
+            if key not in arrow_labels_done:
+                annotate( name, xy=xy, xytext=xytext, ha=ha, va=va )
+                arrow_labels_done.add( key )
+        else:
+            offset = label_offsets.get( key, label_offset_default )
+            if offset is not None:
+                annotate( name, xy=xy, xytext=offset, textcoords='offset points' )
 
     # format plot
     ax1.set_xlabel( "$T_i$ in keV" )
@@ -532,7 +627,7 @@ def main():
         credit_x0 = .755
     fig1.text( credit_x0, .885, credit_str, fontsize=7 )
 
-    make_plot( fname_plot=fname_plot )
+    make_plot( fname_plot=fname_plot, plot_hash=plot_hash, fig=fig1, dpi=dpi_plot )
 
 #;}}}
 
@@ -11,10 +11,11 @@ __copyright__   = 'Uni Stuttgart'
 __license__     = 'MIT'
 
 # import standard modules
+import bisect
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FormatStrFormatter
-import numpy.polynomial.polynomial as poly
+from matplotlib.transforms import offset_copy
 
 # write credits into plot, to ensure that people know then can use the plot
 # I once learned that every plot appearing somewhere on the internet should
@@ -23,6 +24,92 @@ import numpy.polynomial.polynomial as poly
 # is mentioned above and in the LICENSE file
 credit_str  = f'{__author__}, CC BY-SA 4.0'
 
+# data type of the datasets, one record per datapoint
+dataset_dtype   = np.dtype( [ ('year', 'i4'), ('nTtau', 'f8'), ('name', 'U12') ] )
+
+# expected ITER datapoint, can be added to the datasets
+ITER_datapoint  = np.array( [ ( 2035, 4e21*1e-19, 'ITER' ) ], dtype=dataset_dtype )
+
+# nTtau vs time datasets, see get_dataset for the references
+nTtau_datasets = {}
+
+nTtau_datasets['Ikeda'] = np.array( [
+    ( 1968, 1.20724640e-3, 'T3' ),
+    ( 1971, 5.64724637e-3, 'ST' ),
+    ( 1975, 2.22299648e-2, 'TFR'),
+    ( 1978, 6.19673987e-2, 'PLT'),
+    ( 1978, 2.43930051e-1, 'Alcator A'),
+    ( 1981, 1.11644346e-1, 'PDX'),
+    ( 1983, 1.21270482e+0, 'Alcator C'),
+    ( 1984, 8.58771357e-1, 'JET'),
+    ( 1984, 4.62359294e-1, 'DIII'),
+    ( 1986, 1.20045791e+0, 'JET'),
+    ( 1986, 1.82004293e+0, 'TFTR'),
+    ( 1989, 9.14070287e+0, 'JT60U'),
+    ( 1991, 1.29079461e+1, 'JT60U'),
+    ( 1992, 4.40803362e+1, 'JT60U'),
+    ( 1993, 1.06599484e+2, 'JT60U'),
+    ( 1994, 2.14742679e+2, 'JT60U'),
+    ( 1996, 1.46018594e+2, 'JT60U'),
+    ( 1996, 8.02281043e+1, 'TFTR'),
+    ( 1996, 5.97709001e+1, 'DIII-D'),
+    ( 1998, 1.16796162e+2, 'JET')
+    ], dtype=dataset_dtype )
+
+nTtau_datasets['Webster'] = np.array( [
+    ( 1968, 0.0011831415917701873, 'T3'),
+    ( 1971, 0.005544496169709835,  'ST'),
+    ( 1975, 0.022003379868766233, 'TFR'),
+    ( 1978, 0.06186522810656025,  'PLT'),
+    ( 1978, 0.24520180197227637,  'Alcator A'),
+    ( 1981, 0.11280221433667462,  'PDX'),
+    ( 1983, 1.2020523507668979,   'Alcator C'),
+    ( 1984, 0.45755718141889035,  'DIII'),
+    ( 1984, 0.8427948172631539,   'JET'),
+    ( 1986, 1.1899113127482666,   'JET'),
+    ( 1986, 1.7946141450897937,   'TFTR'),
+    ( 1989, 9.191399444917563,    'JT-60U'),
+    ( 1991, 12.977200281296101,   'JT-60U'),
+    ( 1992, 45.03113151570462,    'JT-60U'),
+    ( 1993, 107.11518319232955,   'JT-60U'),
+    ( 1994, 218.1080833047305,    'JT-60U'),
+    ( 1996, 62.220159508278485,   'DIII-D'),
+    ( 1996, 80.32552821013279,    'TFTR'),
+    ( 1996, 149.6097332253447,    'JT-60U'),
+    ( 1998, 117.25347357319447,   'JET')
+    ], dtype=dataset_dtype )
+
+# the datasets are shared between all calls of get_dataset, protect them
+# against (accidental) modifications
+for data in nTtau_datasets.values():
+    data.setflags( write=False )
+
+# offsets (in pixels for dpi=100) of the annotations to the datapoints
+# names which appear in different years are distinguished by the year range,
+# the key is then (name, index of year range)
+label_aliases   = { 'JT-60U': 'JT60U' }
+label_year_bins = { 'JT60U':    [ 1990, 1992, 1995, 1996 ],
+                    'JET':      [ 1996 ],
+                  }
+label_offset_default = ( 10, -5 )
+label_offsets   = { 'Alcator A':    ( -90, -6 ),
+                    'Alcator C':    ( -90, -6 ),
+                    ('JT60U', 0):   ( -64, -6 ),    # left of symbol
+                    ('JT60U', 2):   ( -64, -6 ),    # left of symbol
+                    ('JT60U', 4):   ( -20, 7 ),     # above symbol
+                    ('JET', 1):     ( -6, 9 ),      # above symbol
+                    'ITER':         ( -48, -6 ),
+                  }
+# offsets differing from the ones above when the ITER datapoint is added
+label_offsets_ITER  = { 'Alcator A':    ( -85, -6 ),
+                        'Alcator C':    ( -85, -6 ),
+                        ('JT60U', 0):   ( -65, -6 ),
+                        ('JT60U', 1):   ( 12, -5 ),
+                        ('JT60U', 2):   ( -65, -6 ),
+                        ('JT60U', 3):   ( 12, -5 ),
+                        ('JET', 0):     ( 12, -5 ),
+                      }
+
 
 def get_dataset( dataset='Webster' ):
 #{{{
@@ -44,62 +131,16 @@ def get_dataset( dataset='Webster' ):
 
     Returns
     -------
-        nested list
+    numpy structured array (read-only)
+        with fields 'year', 'nTtau', 'name' (see dataset_dtype)
     """
 
-    possible_datasets   = ['Ikeda', 'Webster']
-
-    if dataset == 'Ikeda':
-        data = [
-            [ 1968, 1.20724640e-3, 'T3' ],
-            [ 1971, 5.64724637e-3, 'ST' ],
-            [ 1975, 2.22299648e-2, 'TFR'], 
-            [ 1978, 6.19673987e-2, 'PLT'], 
-            [ 1978, 2.43930051e-1, 'Alcator A'], 
-            [ 1981, 1.11644346e-1, 'PDX'], 
-            [ 1983, 1.21270482e+0, 'Alcator C'], 
-            [ 1984, 8.58771357e-1, 'JET'], 
-            [ 1984, 4.62359294e-1, 'DIII'], 
-            [ 1986, 1.20045791e+0, 'JET'], 
-            [ 1986, 1.82004293e+0, 'TFTR'], 
-            [ 1989, 9.14070287e+0, 'JT60U'], 
-            [ 1991, 1.29079461e+1, 'JT60U'], 
-            [ 1992, 4.40803362e+1, 'JT60U'], 
-            [ 1993, 1.06599484e+2, 'JT60U'], 
-            [ 1994, 2.14742679e+2, 'JT60U'], 
-            [ 1996, 1.46018594e+2, 'JT60U'], 
-            [ 1996, 8.02281043e+1, 'TFTR'], 
-            [ 1996, 5.97709001e+1, 'DIII-D'], 
-            [ 1998, 1.16796162e+2, 'JET']
-            ]
-    elif dataset == 'Webster':
-        data = [
-            [ 1968, 0.0011831415917701873, 'T3'], 
-            [ 1971, 0.005544496169709835,  'ST'], 
-            [ 1975, 0.022003379868766233, 'TFR'], 
-            [ 1978, 0.06186522810656025,  'PLT'], 
-            [ 1978, 0.24520180197227637,  'Alcator A'], 
-            [ 1981, 0.11280221433667462,  'PDX'], 
-            [ 1983, 1.2020523507668979,   'Alcator C'], 
-            [ 1984, 0.45755718141889035,  'DIII'], 
-            [ 1984, 0.8427948172631539,   'JET'], 
-            [ 1986, 1.1899113127482666,   'JET'], 
-            [ 1986, 1.7946141450897937,   'TFTR'], 
-            [ 1989, 9.191399444917563,    'JT-60U'], 
-            [ 1991, 12.977200281296101,   'JT-60U'], 
-            [ 1992, 45.03113151570462,    'JT-60U'], 
-            [ 1993, 107.11518319232955,   'JT-60U'], 
-            [ 1994, 218.1080833047305,    'JT-60U'], 
-            [ 1996, 62.220159508278485,   'DIII-D'], 
-            [ 1996, 80.32552821013279,    'TFTR'], 
-            [ 1996, 149.6097332253447,    'JT-60U'], 
-            [ 1998, 117.25347357319447,   'JET']
-            ]
-    else:
+    if dataset not in nTtau_datasets:
         print( 'ERROR: dataset does not exist' )
-        print( '       possible datasets are ', possible_datasets )
+        print( '       possible datasets are ', list(nTtau_datasets) )
+        return -1
 
-    return data
+    return nTtau_datasets[dataset]
 #}}}
 
 
@@ -111,7 +152,8 @@ def extract_data( dataset, data2extract ):
 
     Parameters
     ----------
-    dataset: nested list
+    dataset: numpy structured array
+        as returned by get_dataset
     data2extract: str
         Possible values are 'year', nTtau', 'name'
 
@@ -120,29 +162,16 @@ def extract_data( dataset, data2extract ):
     1D numpy array
     """
 
-    possible_data2extract   = ['year', 'nTtau', 'name']
+    possible_data2extract   = dataset.dtype.names
 
-    if data2extract == 'year':
-        chNr    = 0
-    elif data2extract == 'nTtau':
-        chNr    = 1
-    elif data2extract == 'name':
-        chNr    = 2
-    else:
+    if data2extract not in possible_data2extract:
         print( 'ERROR: only the following data can be extracted: ')
         print( '       ', possible_data2extract )
         return -1
 
-    # more efficient to first copy every value into a list and then transfort
-    # into numpy array, instead of using numpy functions like append or
-    # vstack or hstack (because everytime one of those numpy functions is
-    # called, the data is copied)
-    data2return = []
-
-    for ii in range(len(dataset)):
-        data2return.append( dataset[ii][chNr] )
-
-    return( np.array(data2return) )
+    # the datasets are structured arrays, i.e. each column is directly 
+    # available as (strided) view into the dataset without any copying
+    return dataset[data2extract]
 
 #}}}
 
@@ -207,10 +236,21 @@ def plot_nTtau_time( dataset='Webster', add_ITER=False, make_fit=True,
     # optionally, perform and plot a linear fit to log(nTtau) dataset
     # do this without the ITER datapoint
     if make_fit:
-        # perform a linear fit to the log(nTtau) data
-        x_new = np.linspace( np.min(year_vals), np.max(year_vals), 100 )
-        coefs = poly.polyfit( year_vals, np.log10(nTtau_vals), 1 )
-        fit   = poly.polyval( x_new, coefs )
+        # perform a linear fit to the log(nTtau) data, y = a0 + a1*x,
+        # using the closed-form least-squares solution (with centered x)
+        x_new   = np.linspace( np.min(year_vals), np.max(year_vals), 100 )
+        x_fit   = year_vals.astype( np.float64 )
+        y_fit   = np.log10( nTtau_vals )
+        x_mean  = x_fit.mean()
+        x_fit  -= x_mean
+        y_mean  = y_fit.mean()
+        a1      = np.dot( x_fit, y_fit - y_mean ) / np.dot( x_fit, x_fit )
+        a0      = y_mean - a1*x_mean
+        coefs   = ( a0, a1 )
+        # evaluated around the mean to avoid cancellation between a0 and a1*x
+        fit     = y_mean + a1*(x_new - x_mean)
+        # the fit in linear scale, used for plotting and annotating
+        nTtau_fit   = 10**fit
         # calculate the doubling time
         t_double = np.log10(2)/coefs[1]
         print( 'fit performed to y  =  a0 + a1*x, a0={}, a1={}'.format( coefs[0], coefs[1] ) )
@@ -225,22 +265,23 @@ def plot_nTtau_time( dataset='Webster', add_ITER=False, make_fit=True,
         print( '                   --> {} years'.format( np.round( t_double, decimals=1 )))
 
         # plot fit to data
-        ax1.plot( x_new, 10**(fit) )
+        ax1.plot( x_new, nTtau_fit, color='C0' )
         # annotate fit
         ax1.annotate( '{0:3.1f} years doubling rate (fit to data)'.format(np.round(t_double, decimals=1)), 
-                      xy=( x_new[20], 10**(fit[20]) ), xytext=( 1976, .6*nTtau_vals[1] ),
+                      xy=( x_new[20], nTtau_fit[20] ), xytext=( 1976, .6*nTtau_vals[1] ),
                       arrowprops=dict( arrowstyle="->", shrinkA=0, color='0.2' ), 
                       ha='left', va='top'
                     )
 
-    # optionally, add ITER point
+    # optionally, add ITER point (one copy of the dataset for all fields)
     if add_ITER:
-        nTtau_vals  = np.append(nTtau_vals, 4e21*1e-19)
-        year_vals   = np.append(year_vals, 2035)
-        name_vals   = np.append(name_vals, 'ITER')
+        data        = np.concatenate( (data, ITER_datapoint) )
+        name_vals   = extract_data( data, 'name' )
+        year_vals   = extract_data( data, 'year' )
+        nTtau_vals  = extract_data( data, 'nTtau' )
 
     # plot nTtau as a function time dataset
-    ax1.plot( year_vals, nTtau_vals, 'o', markersize=10 )
+    ax1.scatter( year_vals, nTtau_vals, s=10**2, color='C1', linewidths=1., zorder=2 )
 
     # plot format stuff
     ax1.set_xlabel( "Year" , fontsize=16 )
@@ -252,95 +293,32 @@ def plot_nTtau_time( dataset='Webster', add_ITER=False, make_fit=True,
                      labelsize=14, 
                      top='on', right='on' )
 
-    # add annotations to datapoints in a very unefficient (annoying) way
+    # add annotations to datapoints, offsets are taken from the tables 
+    # defined at the top of this file
     # changing the DPI of the image requires to adjust the pixel-offset values
     # this is realized by the factor dpi_scale, 1 corresponds to dpi=100
     if len(fname_plot) == 0:
         dpi_scale = 1
     else:
         dpi_scale = 5
-    # loop through dataset
-    for ii in range( name_vals.shape[0] ):
-        # define list for cases which cannot be annotated automatically
-        extra_labels = [ 'Alcator A', 'Alcator C', 'JT60U', 'JT-60U', 'JET', 'ITER' ]
-        # automatic annotation
-        if name_vals[ii] not in extra_labels:
-            if add_ITER:
-                ax1.annotate( name_vals[ii], 
-                              xy=( year_vals[ii], nTtau_vals[ii]), 
-                              xytext=(10*dpi_scale,-5*dpi_scale), textcoords='offset pixels',
-                            )
-            else:
-                ax1.annotate( name_vals[ii], 
-                              xy=( year_vals[ii], nTtau_vals[ii]), 
-                              xytext=(10*dpi_scale,-5*dpi_scale), textcoords='offset pixels',
-                            )
-        # handles the above defined extra cases
-        elif name_vals[ii] == 'Alcator A' or name_vals[ii] == 'Alcator C': 
-            if add_ITER:
-                ax1.annotate( name_vals[ii], 
-                              xy=( year_vals[ii], nTtau_vals[ii]), 
-                              xytext=(-85*dpi_scale,-6*dpi_scale), textcoords='offset pixels',
-                            )
-            else:
-                ax1.annotate( name_vals[ii], 
-                              xy=( year_vals[ii], nTtau_vals[ii]), 
-                              xytext=(-90*dpi_scale,-6*dpi_scale), textcoords='offset pixels',
-                            )
-        elif (name_vals[ii] == 'JT60U') or (name_vals[ii] == 'JT-60U'):
-            # write left of symbol
-            if (year_vals[ii] < 1990) or ( year_vals[ii] > 1991 and year_vals[ii] < 1995):
-                if add_ITER:
-                    ax1.annotate( name_vals[ii], 
-                                  xy=( year_vals[ii], nTtau_vals[ii]), 
-                                  xytext=(-65*dpi_scale,-6*dpi_scale), textcoords='offset pixels',
-                                )
-                else:
-                    ax1.annotate( name_vals[ii], 
-                                  xy=( year_vals[ii], nTtau_vals[ii]), 
-                                  xytext=(-64*dpi_scale,-6*dpi_scale), textcoords='offset pixels',
-                                )
-            # label above symbol
-            elif year_vals[ii] > 1995:
-                ax1.annotate( name_vals[ii], 
-                              xy=( year_vals[ii], nTtau_vals[ii]), 
-                              xytext=(-20*dpi_scale,7*dpi_scale), textcoords='offset pixels',
-                            )
-            # default case (label right of symbol)
-            else:
-                if add_ITER:
-                    ax1.annotate( name_vals[ii], 
-                                  xy=( year_vals[ii], nTtau_vals[ii]), 
-                                  xytext=(12*dpi_scale,-5*dpi_scale), textcoords='offset pixels',
-                                )
-                else:
-                    ax1.annotate( name_vals[ii], 
-                                  xy=( year_vals[ii], nTtau_vals[ii]), 
-                                  xytext=(10*dpi_scale,-5*dpi_scale), textcoords='offset pixels',
-                                )
-        elif name_vals[ii] == 'JET':
-            if year_vals[ii] > 1995:
-                ax1.annotate( name_vals[ii], 
-                              xy=( year_vals[ii], nTtau_vals[ii]), 
-                              xytext=(-6*dpi_scale,9*dpi_scale), textcoords='offset pixels',
-                            )
-            else:
-                if add_ITER:
-                    ax1.annotate( name_vals[ii], 
-                                  xy=( year_vals[ii], nTtau_vals[ii]), 
-                                  xytext=(12*dpi_scale,-5*dpi_scale), textcoords='offset pixels',
-                                )
-                else:
-                    ax1.annotate( name_vals[ii], 
-                                  xy=( year_vals[ii], nTtau_vals[ii]), 
-                                  xytext=(10*dpi_scale,-5*dpi_scale), textcoords='offset pixels',
-                                )
-        elif name_vals[ii] == 'ITER':
-            ax1.annotate( name_vals[ii], 
-                          xy=( year_vals[ii], nTtau_vals[ii]), 
-                          xytext=(-48*dpi_scale,-6*dpi_scale), textcoords='offset pixels',
-                        )
-    
+    if add_ITER:
+        offsets = { **label_offsets, **label_offsets_ITER }
+    else:
+        offsets = label_offsets
+    # the labels are plain text artists, shifted by an offset transform which
+    # is created only once for each offset
+    offset_trans = {}
+    for name, year, nTtau in zip( name_vals.tolist(), year_vals.tolist(), nTtau_vals.tolist() ):
+        key = label_aliases.get( name, name )
+        if key in label_year_bins:
+            key = ( key, bisect.bisect( label_year_bins[key], year ) )
+        offset = offsets.get( key, label_offset_default )
+        if offset not in offset_trans:
+            offset_trans[offset] = offset_copy( ax1.transData, fig=fig, 
+                                                x=offset[0]*dpi_scale, y=offset[1]*dpi_scale, 
+                                                units='dots' )
+        ax1.text( year, nTtau, name, transform=offset_trans[offset] )
+
     if scr_ratio == '4:3':
         credit_x0   = .703
     elif scr_ratio == '16:9':